@@ -87,6 +87,9 @@ class AlphaBetaAgent(Agent):
     """
     Implements the alpha-beta pruning algorithm to find the best action.
 
+    The whole tree is explored with one mutable position (see ShobuPosition): each action is made
+    before exploring the child and unmade after.
+
     Args:
         state (ShobuState): The current game state.
 
@@ -94,7 +97,7 @@ class AlphaBetaAgent(Agent):
         ShobuAction: The best action as determined by the alpha-beta algorithm.
     """
     def alpha_beta_search(self, state):
-        _, action = self.max_value(state, - float("inf"), float("inf"), 0)
+        _, action = self.max_value(self.game.position(state), - float("inf"), float("inf"), 0)
         return action
 
     """
@@ -104,7 +107,7 @@ class AlphaBetaAgent(Agent):
     the player's score, pruning branches that cannot possibly affect the final decision.
 
     Args:
-        - state (ShobuState): The current state of the game.
+        - state (ShobuPosition): The current position of the game, restored before returning.
         - alpha (float): The current alpha value, representing the minimum score that the maximizing player is assured of.
         - beta (float): The current beta value, representing the maximum score that the minimizing player is assured of.
         - depth (int): The current depth in the search tree.
@@ -123,8 +126,9 @@ class AlphaBetaAgent(Agent):
         
         for action in self.game.actions(state):
             
-            result_state = self.game.result(state, action)
-            currValue, _ = self.min_value(result_state, alpha, beta, depth + 1)
+            undo = state.make(action)
+            currValue, _ = self.min_value(state, alpha, beta, depth + 1)
+            state.unmake(undo)
 
             if maxValue < currValue:
                 maxValue, bestMove = currValue, action
@@ -144,7 +148,7 @@ class AlphaBetaAgent(Agent):
     affect the outcome.
 
     Args:
-        - state (ShobuState): The current state of the game.
+        - state (ShobuPosition): The current position of the game, restored before returning.
         - alpha (float): The current alpha value, representing the minimum score that the maximizing player is assured of.
         - beta (float): The current beta value, representing the maximum score that the minimizing player is assured of.
         - depth (int): The current depth in the search tree.
@@ -163,8 +167,9 @@ class AlphaBetaAgent(Agent):
         
         for action in self.game.actions(state):
             
-            result_state = self.game.result(state, action)
-            currValue, _ = self.max_value(result_state, alpha, beta, depth + 1)
+            undo = state.make(action)
+            currValue, _ = self.max_value(state, alpha, beta, depth + 1)
+            state.unmake(undo)
             
             if currValue < minValue:
                 minValue, bestMove = currValue, action
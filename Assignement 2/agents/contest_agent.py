@@ -686,6 +686,7 @@ class AI(Agent):
 
     """
     Compute the best move using the alpha-beta search algorithm with transposition table.
+    The tree is explored in place on one position (see ShobuPosition), each action being made and unmade.
     """
     def search_alphaBeta(self, state, depth_total):
 
@@ -730,8 +731,9 @@ class AI(Agent):
                 first_turn = False
 
             for action in actions:
-                child_state = self.game.result(state, action)
-                eval_child = min_value(child_state, alpha, beta, depth - 1)
+                undo = state.make(action)
+                eval_child = min_value(state, alpha, beta, depth - 1)
+                state.unmake(undo)
                 if eval_child > max_eval:
                     max_eval = eval_child
                     if depth == depth_total:
@@ -786,8 +788,9 @@ class AI(Agent):
             actions = self.moveReordering(state, actions)
 
             for action in actions:
-                child_state = self.game.result(state, action)
-                eval_child = max_value(child_state, alpha, beta, depth - 1)
+                undo = state.make(action)
+                eval_child = max_value(state, alpha, beta, depth - 1)
+                state.unmake(undo)
                 if eval_child < min_eval:
                     min_eval = eval_child
                     if alpha >= min_eval:
@@ -807,7 +810,7 @@ class AI(Agent):
             return min_eval
         
         start = time.time()
-        utility_state = max_value(state, - float("inf"), float("inf"), depth_total)
+        utility_state = max_value(self.game.position(state), - float("inf"), float("inf"), depth_total)
         end = time.time()
         self.total_time += end - start
         return utility_state
\ No newline at end of file
@@ -191,11 +191,12 @@ class UCTAgent(Agent):
         currIteration = 0
         opponent_player = 1 - state.to_move
 
-        # Simulate a random play-through from the given state to a terminal state
+        # Simulate a random play-through from the given state to a terminal state, in place on a copy of it
+        state = self.game.position(state)
         while not self.game.is_terminal(state) and currIteration < MAX_ITERATION:
             available_actions = self.game.actions(state)
             random_action = random.choice(available_actions)
-            state = self.game.result(state, random_action)
+            state.make(random_action)
             currIteration += 1
 
         return self.game.utility(state, opponent_player)
@@ -0,0 +1,99 @@
+"""
+Alpha-beta benchmark : search a few positions with AlphaBetaAgent at each depth, with the
+lazy states (actions and utility computed when first read) and with the eager ones, and
+print the number of nodes (actions made on the searched position), the number of
+evaluated leaves and the nodes per second.
+
+Run from the "Assignement 2" directory, for example :
+
+> python3 benchmark.py -d 3 4 -p 5
+"""
+
+from agents.alphabeta_agent import AlphaBetaAgent
+from shobu import ShobuGame
+
+import argparse
+import random
+import time
+
+
+"""
+A ShobuGame counting the actions applied by result or by the positions (see compute_move).
+"""
+class CountingGame(ShobuGame):
+
+    def __init__(self, lazy=True):
+        super().__init__(lazy=lazy)
+        self.nodes = 0
+
+    def compute_move(self, bits, player, action):
+        self.nodes += 1
+        return super().compute_move(bits, player, action)
+
+
+"""
+Returns the positions of the benchmark: the initial one, then the positions reached by
+random games after 10, 20, ... moves (the position before the end if the game ends earlier).
+
+Args:
+    n_positions (int): The number of positions.
+    seed (int): The seed of the random games.
+
+Returns:
+    list of (int, int, int): The (player to move, bits, count_boring_actions) of each position.
+"""
+def get_positions(n_positions, seed=0):
+    rng = random.Random(seed)
+    game = ShobuGame()
+    positions = []
+    for i in range(n_positions):
+        state = game.initial
+        for _ in range(10 * i):
+            next_state = game.result(state, rng.choice(state.actions))
+            if game.is_terminal(next_state):
+                break
+            state = next_state
+        positions.append((state.to_move, state.bits, state.count_boring_actions))
+    return positions
+
+
+"""
+Searches every position with an AlphaBetaAgent of the given depth.
+
+Args:
+    positions (list): The positions returned by get_positions.
+    depth (int): The depth of the search.
+    lazy (bool): Whether the game uses lazy states.
+
+Returns:
+    tuple: The number of nodes, the number of evaluated leaves and the time (in seconds).
+"""
+def run(positions, depth, lazy):
+    ShobuGame.segment_cache.clear()
+    game = CountingGame(lazy=lazy)
+    elapsed = 0
+    leaves = 0
+    for player, bits, count_boring_actions in positions:
+        state = game.initial._replace(to_move=player, bits=bits, actions=None, utility=None,
+                                      count_boring_actions=count_boring_actions)
+        agent = AlphaBetaAgent(player, game, depth)
+        start = time.perf_counter()
+        agent.alpha_beta_search(state)
+        elapsed += time.perf_counter() - start
+        leaves += agent.nodeExplored
+    return game.nodes, leaves, elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Alpha-beta benchmark')
+    parser.add_argument('-d', '--depths', type=int, nargs='+', default=[3, 4], help='Depths of the searches')
+    parser.add_argument('-p', '--positions', type=int, default=5, help='Number of positions')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='Seed of the random games giving the positions')
+    args = parser.parse_args()
+
+    positions = get_positions(args.positions, args.seed)
+    print(f"{'Depth':>5} {'Mode':>6} {'Nodes':>10} {'Leaves':>10} {'Time [s]':>9} {'Nodes/s':>10}")
+    for depth in args.depths:
+        for lazy in (False, True):
+            nodes, leaves, elapsed = run(positions, depth, lazy)
+            print(f"{depth:>5} {'lazy' if lazy else 'eager':>6} {nodes:>10} {leaves:>10} {elapsed:>9.2f} {nodes / elapsed:>10.0f}")
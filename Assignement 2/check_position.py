@@ -0,0 +1,93 @@
+"""
+Randomized differential check of the in-place positions (see ShobuPosition) against
+ShobuGame.result : along random games, every legal action (and a few illegal ones)
+is made on a position and compared with the state returned by result, then unmade and
+compared with the original state; random sequences of moves are also made, then
+unmade back to their first position.
+
+Run from the "Assignement 2" directory, for example :
+
+> python3 check_position.py -g 20 -s 0
+"""
+
+from shobu import ShobuGame, ACTION_CODES
+
+import argparse
+import random
+
+
+"""
+Checks that a position and a state are the same: player to move, stones, counter of
+moves without push, actions and utility.
+"""
+def check_same(position, state, context):
+    assert position.to_move == state.to_move, f"{context}: to_move {position.to_move} != {state.to_move}"
+    assert position.bits == state.bits, f"{context}: bits {position.bits:#x} != {state.bits:#x}"
+    assert position.count_boring_actions == state.count_boring_actions, \
+        f"{context}: count_boring_actions {position.count_boring_actions} != {state.count_boring_actions}"
+    assert position.utility == state.utility, f"{context}: utility {position.utility} != {state.utility}"
+    assert position.actions == state.actions, f"{context}: different actions"
+
+
+"""
+Plays random games and checks make and unmake along them.
+
+Args:
+    game (ShobuGame): The game.
+    n_games (int): The number of games.
+    rng (random.Random): The random generator.
+    walk_length (int): The maximal length of the random sequences of moves.
+
+Returns:
+    int: The number of checked actions.
+"""
+def check_games(game, n_games, rng, walk_length=20):
+    all_actions = list(ACTION_CODES)
+    checked = 0
+    for i in range(n_games):
+        state = game.initial
+        position = game.position(state)
+        n_moves = 0
+        while not game.is_terminal(state) and n_moves < 200:
+            context = f"game {i}, move {n_moves}"
+
+            # Every legal action, and a few illegal ones (which leave the position unchanged).
+            actions = position.actions
+            for action in list(actions) + rng.sample(all_actions, 5):
+                undo = position.make(action)
+                check_same(position, game.result(state, action), f"{context}, make {action}")
+                position.unmake(undo)
+                check_same(position, state, f"{context}, unmake {action}")
+                checked += 1
+            assert position.actions is actions, f"{context}: actions not restored"
+
+            # A random sequence of moves, made then unmade back to the state.
+            states, undos = [state], []
+            for _ in range(rng.randint(1, walk_length)):
+                if game.is_terminal(states[-1]):
+                    break
+                action = rng.choice(states[-1].actions)
+                undos.append(position.make(action))
+                states.append(game.result(states[-1], action))
+                check_same(position, states[-1], f"{context}, walk of {len(undos)} moves")
+            while undos:
+                position.unmake(undos.pop())
+                states.pop()
+                check_same(position, states[-1], f"{context}, unmake walk back to {len(undos)} moves")
+
+            state = game.result(state, rng.choice(actions))
+            position = game.position(state)
+            n_moves += 1
+    return checked
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Differential check of make/unmake against result')
+    parser.add_argument('-g', '--games', type=int, default=20, help='Number of random games')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='Seed of the random games')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for lazy in (True, False):
+        checked = check_games(ShobuGame(lazy=lazy), args.games, rng)
+        print(f"{'lazy' if lazy else 'eager'}: {checked} actions checked, make/unmake match result")
@@ -75,7 +75,7 @@ def main(agent_white, agent_black, display=False, log_file=None, play_time=600):
                 if log_file is not None:
                     logs.append(create_log(action, n_moves))
 
-                if action not in game.actions(state):
+                if not game.is_legal(state, action):
                     raise Exception(f"Invalid action: {action}")
                 
                 state = game.result(state, action)
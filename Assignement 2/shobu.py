@@ -1,4 +1,6 @@
-from typing import NamedTuple, List, Set
+from array import array
+from functools import lru_cache
+from typing import NamedTuple, List, FrozenSet, Tuple
 
 """
 Represents an action in the Shobu game, encompassing both passive and active moves.
@@ -31,6 +33,200 @@ class ShobuAction(NamedTuple):
     length: int
 
 
+"""
+Bitboards.
+
+A board is a 16-bit mask per player, bit i being set if the player has a stone on
+position i (same position indexing as below). The whole position is one integer
+holding the 8 masks: the stones of player p on board b are the 16 bits starting at
+bit 32*b + 16*p, so each board takes 32 bits (white stones in the low half).
+
+A stone moves one square in a direction by shifting its bit by the direction offset.
+SHIFT_SOURCES[direction] is the mask of the squares having a neighbour in that
+direction: masking before shifting drops the stones that would leave the board
+(or wrap around to the other side of it).
+"""
+BOARD_MASK = 0xFFFF
+COLUMN_0 = 0x1111
+COLUMN_3 = 0x8888
+ROW_0 = 0x000F
+ROW_3 = 0xF000
+
+DIRECTIONS = (1, -1, 3, -3, 4, -4, 5, -5)
+
+SHIFT_SOURCES = {
+    1: BOARD_MASK & ~COLUMN_3,
+    -1: BOARD_MASK & ~COLUMN_0,
+    4: BOARD_MASK & ~ROW_3,
+    -4: BOARD_MASK & ~ROW_0,
+    5: BOARD_MASK & ~COLUMN_3 & ~ROW_3,
+    -5: BOARD_MASK & ~COLUMN_0 & ~ROW_0,
+    3: BOARD_MASK & ~COLUMN_0 & ~ROW_3,
+    -3: BOARD_MASK & ~COLUMN_3 & ~ROW_0,
+}
+
+# For each direction: (direction, SHIFT_SOURCES[direction], left shift, right shift, SHIFT_SOURCES[-direction]).
+# A mask m moves one square forward with ((m & sources) << left >> right), backward with
+# ((m & back_sources) << right >> left).
+SHIFTS = tuple((direction, SHIFT_SOURCES[direction], max(direction, 0), max(-direction, 0), SHIFT_SOURCES[-direction])
+               for direction in DIRECTIONS)
+
+INITIAL_BITS = sum((ROW_0 | ROW_3 << 16) << 32 * board_id for board_id in range(4))
+
+
+"""
+Moves every stone of a 16-bit mask one square in the given direction, dropping the
+stones leaving the board. shift(mask, -direction) gives the squares from which a
+move in the given direction lands on the mask.
+"""
+def shift(mask, direction):
+    mask &= SHIFT_SOURCES[direction]
+    return mask << direction if direction > 0 else mask >> -direction
+
+
+"""
+Rays of the moves of one stone, built once so that the move generation, the legality checks and
+the application of the moves never compute squares: RAYS[square][direction_index][length - 1] is
+None if a stone on the square leaves the board when moving length squares in the direction
+DIRECTIONS[direction_index], else the tuple of 16-bit masks (path, landing, beyond):
+    - path: the squares the stone passes through, up to its landing square (included)
+    - landing: the landing square
+    - beyond: the square following the landing one, where a stone pushed by the move lands
+      (0 if it is pushed off the board)
+"""
+def _ray(square, direction, length):
+    path, landing = 0, 1 << square
+    for _ in range(length):
+        landing = shift(landing, direction)
+        path |= landing
+    if not landing:
+        return None
+    return path, landing, shift(landing, direction)
+
+RAYS = tuple(tuple(tuple(_ray(square, direction, length) for length in (1, 2)) for direction in DIRECTIONS)
+             for square in range(16))
+
+
+"""
+Returns the positions of the stones of a 16-bit mask, in increasing order.
+A board holds at most 4 stones of each player, so few masks occur and they are cached.
+"""
+@lru_cache(maxsize=None)
+def squares(mask):
+    return tuple(i for i in range(16) if mask >> i & 1)
+
+
+"""
+Returns the stones of a 16-bit mask as a frozenset of positions (cached as squares).
+"""
+@lru_cache(maxsize=None)
+def stone_set(mask):
+    return frozenset(squares(mask))
+
+
+"""
+Returns the set view of a bitboard position: for each of the 4 boards, the pair
+(white stones, black stones) of frozensets of positions.
+"""
+def board_view(bits):
+    return tuple((stone_set(bits >> 32 * board_id & BOARD_MASK), stone_set(bits >> 32 * board_id + 16 & BOARD_MASK))
+                 for board_id in range(4))
+
+
+"""
+Returns the bitboard position of a set view (any nesting of 4 pairs of collections
+of positions, such as the board of the former set representation).
+"""
+def pack_board(board):
+    bits = 0
+    for board_id, stones in enumerate(board):
+        for player in range(2):
+            for position in stones[player]:
+                bits |= 1 << 32 * board_id + 16 * player + position
+    return bits
+
+
+"""
+Action codes.
+
+Each action is numbered by a 16-bit integer, so move lists fit in an array('H') and tables
+indexed by action (move ordering, killer moves, best moves of a transposition table) can use
+small ints:
+
+    code = ((((passive_board_id * 4 + active_board_id) * 8 + DIRECTIONS.index(direction)) * 2
+             + length - 1) * 16 + active_stone_id) * 16 + passive_stone_id
+
+All the actions are built once: CODE_ACTIONS[code] is the ShobuAction of a code (None for the
+codes of two boards of the same color) and ACTION_CODES[action] the code of an action, so the
+move generation never creates ShobuAction objects. ACTION_BASES[passive_board_id, active_board_id,
+direction, length] is the code of the action with stones 0 and 0, the other codes of these boards,
+direction and length being ACTION_BASES[...] + 16 * active_stone_id + passive_stone_id.
+"""
+ACTION_BASES = {
+    (passive_board_id, active_board_id, direction, length):
+        (((passive_board_id * 4 + active_board_id) * 8 + direction_index) * 2 + length - 1) * 256
+    for passive_board_id in range(4) for active_board_id in range(4) if (passive_board_id + active_board_id) % 2 == 1
+    for direction_index, direction in enumerate(DIRECTIONS) for length in (1, 2)
+}
+
+CODE_ACTIONS = [None] * 2 ** 16
+for (passive_board_id, active_board_id, direction, length), base in ACTION_BASES.items():
+    for active_stone_id in range(16):
+        for passive_stone_id in range(16):
+            CODE_ACTIONS[base + 16 * active_stone_id + passive_stone_id] = ShobuAction(
+                passive_board_id, passive_stone_id, active_board_id, active_stone_id, direction, length)
+
+ACTION_CODES = {action: code for code, action in enumerate(CODE_ACTIONS) if action is not None}
+
+
+"""
+The rays (see RAYS) of the two moves of each code: CODE_MOVES[code] is None if a stone of the
+action would leave its board, else the tuple (passive_board_id, passive origin, passive path,
+passive landing, active_board_id, active origin, active path, active landing, beyond), the
+origins being the squares of the moved stones.
+"""
+def _code_move(action):
+    passive_board_id, passive_stone_id, active_board_id, active_stone_id, direction, length = action
+    direction_index = DIRECTIONS.index(direction)
+    passive_ray = RAYS[passive_stone_id][direction_index][length - 1]
+    active_ray = RAYS[active_stone_id][direction_index][length - 1]
+    if passive_ray is None or active_ray is None:
+        return None
+    return (passive_board_id, 1 << passive_stone_id) + passive_ray[:2] + (active_board_id, 1 << active_stone_id) + active_ray
+
+CODE_MOVES = [None if action is None else _code_move(action) for action in CODE_ACTIONS]
+
+
+"""
+The application of each action which stays on its boards: ACTION_MOVES[action] is the tuple
+(moved, active board offset, active path, beyond), moved being the bits of the origin and landing
+squares of both moves of white (shifted left by 16 for black), the active board offset the first
+bit of the active board and the active path and beyond those of CODE_MOVES.
+"""
+ACTION_MOVES = {}
+for code, move in enumerate(CODE_MOVES):
+    if move is not None:
+        passive_board_id, passive_origin, _, passive_landing, active_board_id, active_origin, active_path, active_landing, beyond = move
+        ACTION_MOVES[CODE_ACTIONS[code]] = ((passive_origin | passive_landing) << 32 * passive_board_id
+                                            | (active_origin | active_landing) << 32 * active_board_id,
+                                            32 * active_board_id, active_path, beyond)
+
+
+"""
+Returns the code of an action, or None if it is not a valid action (boards of the same color,
+stone outside of the board, unknown direction or length).
+"""
+def encode_action(action):
+    return ACTION_CODES.get(action)
+
+
+"""
+Returns the action of a code (see encode_action).
+"""
+def decode_action(code):
+    return CODE_ACTIONS[code]
+
+
 """
 Represents the current state of a Shobu game.
 
@@ -39,15 +235,23 @@ Attributes:
     utility (int): The utility score of the game, from the perspective of player 0. A score of 1
         indicates a win for player 0, -1 indicates a loss, and 0 typically indicates an ongoing
         game or a draw.
-    board (List[List[Set[int], Set[int]]]): A representation of the 4 boards in the game.
-        Each board is represented as a list containing two sets: the first set contains positions
-        of player 0's stones, and the second set contains positions of player 1's stones. The
-        positions on each board are numbered from 0 to 15, starting from the bottom left corner.
+    bits (int): The bitboard position (see above): the 8 masks of the stones of each player
+        on each board, packed in one integer.
     actions (List[ShobuAction]): A list of legal actions (`ShobuAction` objects) available to the player who is
         next to move, based on the current state.
+    codes (array): The codes of the legal actions (see encode_action), in the same order, computed when first read.
     count_boring_actions (int): A counter that tracks the number of consecutive actions taken
         that do not result in pushing a stone during the active move. This can be used for determining stalemate or
         draw conditions.
+    game (ShobuGame): The game computing actions and utility when they are first read, if the state was
+        created with None for them (lazy mode, see ShobuGame.result). States are equal when they have the
+        same player to move, position and count_boring_actions.
+
+Properties:
+    board (Tuple[Tuple[FrozenSet[int], FrozenSet[int]]]): The set view of the position (see board_view), a
+        representation of the 4 boards in the game. Each board is represented as a pair of sets: the first set
+        contains positions of player 0's stones, and the second set contains positions of player 1's stones. The
+        positions on each board are numbered from 0 to 15, starting from the bottom left corner.
 
 The game layout is as follows, with the boards arranged in a 2x2 grid:
 
@@ -67,19 +271,105 @@ The game layout is as follows, with the boards arranged in a 2x2 grid:
 Note:
     To ease the comprihension of the board representation, the initial board configuration is represented as:
         
-        board = [
-            [{0, 1, 2, 3}, {12, 13, 14, 15}],
-            [{0, 1, 2, 3}, {12, 13, 14, 15}],
-            [{0, 1, 2, 3}, {12, 13, 14, 15}],
-            [{0, 1, 2, 3}, {12, 13, 14, 15}]
-        ]
+        board = (
+            ({0, 1, 2, 3}, {12, 13, 14, 15}),
+            ({0, 1, 2, 3}, {12, 13, 14, 15}),
+            ({0, 1, 2, 3}, {12, 13, 14, 15}),
+            ({0, 1, 2, 3}, {12, 13, 14, 15})
+        )
 """
-class ShobuState(NamedTuple):
-    to_move: int
-    utility: int
-    board: List[List[Set[int]]]
-    actions: List[ShobuAction]
-    count_boring_actions: int
+class ShobuState:
+    __slots__ = ("to_move", "bits", "count_boring_actions", "game", "_utility", "_actions", "_codes")
+
+    def __init__(self, to_move, utility, bits, actions, count_boring_actions, game=None):
+        self.to_move = to_move
+        self.bits = bits
+        self.count_boring_actions = count_boring_actions
+        self.game = game
+        self._utility = utility
+        self._actions = actions
+        self._codes = None
+
+    @property
+    def actions(self) -> List[ShobuAction]:
+        if self._actions is None:
+            self._actions = self.game.compute_actions(self.bits, self.to_move)
+        return self._actions
+
+    @property
+    def codes(self) -> array:
+        if self._codes is None:
+            self._codes = self.game.compute_codes(self.bits, self.to_move)
+        return self._codes
+
+    @property
+    def utility(self) -> int:
+        if self._utility is None:
+            self._utility = self.game.compute_utility(self.bits, self.to_move, self._actions)
+        return self._utility
+
+    @property
+    def board(self) -> Tuple[Tuple[FrozenSet[int], FrozenSet[int]], ...]:
+        return board_view(self.bits)
+
+    def _replace(self, **changes):
+        fields = dict(to_move=self.to_move, utility=self._utility, bits=self.bits, actions=self._actions,
+                      count_boring_actions=self.count_boring_actions, game=self.game)
+        fields.update(changes)
+        return ShobuState(**fields)
+
+    def __eq__(self, other):
+        return (isinstance(other, ShobuState) and self.to_move == other.to_move and self.bits == other.bits
+                and self.count_boring_actions == other.count_boring_actions)
+
+    def __hash__(self):
+        return hash((self.to_move, self.bits, self.count_boring_actions))
+
+    def __repr__(self):
+        return "ShobuState(to_move={}, utility={}, bits={:#x}, count_boring_actions={})".format(
+            self.to_move, self.utility, self.bits, self.count_boring_actions)
+
+"""
+A mutable ShobuState, used by a search to explore its whole tree with one object: make applies an
+action in place and returns an undo record, and unmake restores the position saved in it exactly
+(including the actions, codes and utility already computed, so they are not computed again).
+
+    position = game.position(state)
+    for action in game.actions(position):
+        undo = position.make(action)
+        ...  # the position is now game.result(state, action)
+        position.unmake(undo)
+
+As for result, an action which is not legal leaves the position unchanged. A position is not
+hashable, since it changes; to_state returns an immutable copy.
+"""
+class ShobuPosition(ShobuState):
+    __slots__ = ()
+    __hash__ = None
+
+    def make(self, action):
+        undo = (self.bits, self.to_move, self.count_boring_actions, self._actions, self._utility, self._codes)
+        game = self.game
+        if not game.check_action(self.bits, self.to_move, action):
+            return undo
+
+        self.bits, pushing = game.compute_move(self.bits, self.to_move, action)
+        self.to_move = (self.to_move + 1) % 2
+        self.count_boring_actions = 0 if pushing else self.count_boring_actions + 1
+        self._codes = None
+        if game.lazy:
+            self._actions = self._utility = None
+        else:
+            self._actions = game.compute_actions(self.bits, self.to_move)
+            self._utility = game.compute_utility(self.bits, self.to_move, self._actions)
+        return undo
+
+    def unmake(self, undo):
+        self.bits, self.to_move, self.count_boring_actions, self._actions, self._utility, self._codes = undo
+
+    def to_state(self):
+        return ShobuState(self.to_move, self._utility, self.bits, self._actions, self.count_boring_actions, self.game)
+
 
 """
 Represents the game logic and state management for a game of Shobu.
@@ -88,46 +378,40 @@ This class encapsulates the game mechanics, including the initialization of the
 determining legal actions, executing moves, and calculating game outcomes.
 
 Attributes:
-    autorised_moves (list of sets): A precomputed list of legal moves for stones based on their position on the board.
+    segment_cache (dict): The actions of each pair of boards already computed (shared by all games), see compute_segments.
+    max_segment_cache (int): The number of entries of segment_cache above which it is emptied.
+    autorised_moves (list of sets): The (direction, maximal length) pairs of the moves of a stone on each square, derived from RAYS.
     max_count_boring_actions (int): The maximum number of moves without any pushed stone before the game is considered a draw.
+    lazy (bool): Whether result leaves the actions and utility of the new state to be computed when first read.
     initial (ShobuState): The initial state of the game with the board setup and starting player.
 
 Methods:
     to_move(state): Returns the player whose turn it is to move.
     actions(state): Returns a list of legal actions for the current state.
+    is_legal(state, action): Checks if an action is legal in the current state.
     result(state, action): Returns the state that results from executing the given action on the current state.
+    position(state): Returns a mutable copy of the state, to make and unmake actions in place.
     is_terminal(state): Checks if the game has reached a terminal state.
     utility(state, player): Return the utility of a terminal state for a given player.
-    compute_actions(board, player): Computes and returns all legal actions for the given player on the current board.
-    compute_utility(board, player, actions): Computes the utility of the current board state for the given player.
+    compute_move(bits, player, action): Computes the bitboard position after the given action.
+    compute_actions(bits, player): Computes and returns all legal actions for the given player on the current board.
+    compute_codes(bits, player): Computes the codes of all legal actions for the given player on the current board.
+    compute_segments(bits, player): Returns the codes and actions of the 4 pairs of boards of the given player.
+    compute_segment(bits, player, passive_board_id, active_board_id): Computes the legal actions using two given boards.
+    has_actions(bits, player): Checks if the given player has at least one legal action, without listing them.
+    check_action(bits, player, action): Checks if an action is legal for the given player, without listing the actions.
+    compute_utility(bits, player, actions): Computes the utility of the current board state for the given player.
 """
 class ShobuGame:
 
-    autorised_moves = [
-        # Row 0
-        {(4, 2), (5, 2), (1, 2)},
-        {(4, 2), (5, 2), (1, 2), (-1, 1), (3, 1)},
-        {(4, 2), (5, 1), (1, 1), (-1, 2), (3, 2)},
-        {(4, 2), (-1, 2), (3, 2)},
-
-        # Row 1
-        {(4, 2), (5, 2), (1, 2), (-3, 1), (-4, 1)},
-        {(4, 2), (5, 2), (1, 2), (-3, 1), (-4, 1), (-5, 1), (-1, 1), (3, 1)},
-        {(4, 2), (5, 1), (1, 1), (-3, 1), (-4, 1), (-5, 1), (-1, 2), (3, 2)},
-        {(4, 2), (-4, 1), (-5, 1), (-1, 2), (3, 2)},
-
-        # Row 2
-        {(4, 1), (5, 1), (1, 2), (-3, 2), (-4, 2)},
-        {(4, 1), (5, 1), (1, 2), (-3, 2), (-4, 2), (-5, 1), (-1, 1), (3, 1)},
-        {(4, 1), (5, 1), (1, 1), (-3, 1), (-4, 2), (-5, 2), (-1, 2), (3, 1)},
-        {(4, 1), (-4, 2), (-5, 2), (-1, 2), (3, 1)},
+    # (passive board, active board, passive board stones, active board stones) -> (codes, actions), see compute_segments.
+    segment_cache = dict()
+    max_segment_cache = 2 ** 15
 
-        # Row 3
-        {(1, 2), (-3, 2), (-4, 2)},
-        {(1, 2), (-3, 2), (-4, 2), (-5, 1), (-1, 1)},
-        {(1, 1), (-3, 1), (-4, 2), (-5, 2), (-1, 2)},
-        {(-4, 2), (-5, 2), (-1, 2)}
-    ]
+    # (direction, maximal length) of the moves of a stone on each square, see RAYS.
+    autorised_moves = [{(direction, 2 if RAYS[square][direction_index][1] else 1)
+                        for direction_index, direction in enumerate(DIRECTIONS) if RAYS[square][direction_index][0]}
+                       for square in range(16)]
 
 
     """
@@ -135,17 +419,15 @@ class ShobuGame:
 
     Args:
         max_count_boring_actions (int, optional): The maximum number of consecutive non-pushing actions allowed before declaring the game a draw. Defaults to 50.
+        lazy (bool, optional): Whether the actions and utility of the states returned by result are only computed
+            when first read. Most children of a search are cut off or only evaluated, so they never need their
+            actions. Defaults to True.
     """
-    def __init__(self, max_count_boring_actions=50):
+    def __init__(self, max_count_boring_actions=50, lazy=True):
         self.max_count_boring_actions = max_count_boring_actions
-        board = [
-            [{0, 1, 2, 3}, {12, 13, 14, 15}],
-            [{0, 1, 2, 3}, {12, 13, 14, 15}],
-            [{0, 1, 2, 3}, {12, 13, 14, 15}],
-            [{0, 1, 2, 3}, {12, 13, 14, 15}]
-        ]
-        actions = self.compute_actions(board, 0)
-        self.initial = ShobuState(to_move=0, utility=0, board=board, actions=actions, count_boring_actions=0)
+        self.lazy = lazy
+        actions = self.compute_actions(INITIAL_BITS, 0)
+        self.initial = ShobuState(to_move=0, utility=0, bits=INITIAL_BITS, actions=actions, count_boring_actions=0, game=self)
 
 
     """
@@ -174,9 +456,26 @@ class ShobuGame:
         return state.actions
 
 
+    """
+    Checks if an action is legal in the given state, in constant time (see check_action), as
+    action in state.actions but without computing and scanning the list.
+
+    Args:
+        state (ShobuState): The current state of the game.
+        action (ShobuAction): The action to check.
+
+    Returns:
+        bool: True if the action is legal for the player to move, False otherwise.
+    """
+    def is_legal(self, state, action):
+        return self.check_action(state.bits, state.to_move, action)
+
+
     """
     Computes the state resulting from taking a specific action in the given state.
 
+    In lazy mode, the actions and utility of the new state are left to None and computed when first read.
+
     Args:
         state (ShobuState): The current state of the game.
         action (ShobuAction): The action to be executed.
@@ -185,55 +484,62 @@ class ShobuGame:
         ShobuState: The state resulting from the execution of the action.
     """
     def result(self, state, action):
-        if action not in state.actions:
+        if not self.check_action(state.bits, state.to_move, action):
             return state
 
-        board = state.board
-        next_board = [
-            [set(board[0][0]), set(board[0][1])],
-            [set(board[1][0]), set(board[1][1])],
-            [set(board[2][0]), set(board[2][1])],
-            [set(board[3][0]), set(board[3][1])],
-        ]
-        
-        passive_board_id, passive_stone_id, active_board_id, active_stone_id, direction, length = action
-        player = state.to_move
-        opponent = (player + 1) % 2
+        bits, pushing = self.compute_move(state.bits, state.to_move, action)
 
-        # Act passive move
-        passive_board = next_board[passive_board_id]
-        player_passive_stones = passive_board[player]
-        
-        player_passive_stones.remove(passive_stone_id)
-        player_passive_stones.add(passive_stone_id + length * direction)
-
-        # Act active move
-        active_board = next_board[active_board_id]
-        player_active_stones = active_board[player]
-        opponent_active_stones = active_board[opponent]
-
-        pushing = False
-        opponent_active_stone = -1
-        for l in range(1, length+1):
-            if active_stone_id + l*direction in opponent_active_stones:
-                pushing = True
-                opponent_active_stone = active_stone_id + l*direction
-                break
-        
-        player_active_stones.remove(active_stone_id)
-        player_active_stones.add(active_stone_id + length * direction)
+        next_to_move = (state.to_move + 1) % 2
+        count_boring_actions = 0 if pushing else state.count_boring_actions+1
+        if self.lazy:
+            return ShobuState(next_to_move, None, bits, None, count_boring_actions, self)
 
+        next_actions = self.compute_actions(bits, next_to_move)
+        next_utility = self.compute_utility(bits, next_to_move, next_actions)
+
+        return ShobuState(to_move=next_to_move, utility=next_utility, bits=bits, actions=next_actions, count_boring_actions=count_boring_actions, game=self)
+
+
+    """
+    Returns a mutable copy of a state, on which a search can make and unmake the actions in place
+    (see ShobuPosition) instead of creating a state per node with result.
+
+    Args:
+        state (ShobuState): The state to copy.
+
+    Returns:
+        ShobuPosition: The position of the state.
+    """
+    def position(self, state):
+        return ShobuPosition(state.to_move, state._utility, state.bits, state._actions, state.count_boring_actions, self)
+
+
+    """
+    Computes the bitboard position after a legal action of the given player, with the rays of
+    the action (see ACTION_MOVES).
+
+    Args:
+        bits (int): The bitboard position.
+        player (int): The player making the action (0 or 1).
+        action (ShobuAction): The action, which must be legal.
+
+    Returns:
+        tuple: The new bitboard position and whether an opponent stone was pushed.
+    """
+    def compute_move(self, bits, player, action):
+        moved, active_offset, active_path, beyond = ACTION_MOVES[action]
+
+        # Act passive and active moves
+        bits ^= moved << 16 * player
+
+        # The opponent stone on the path (at most one, the move is legal) is pushed beyond the landing square.
+        opponent_offset = active_offset + 16 * ((player + 1) % 2)
+        pushed = bits >> opponent_offset & active_path
+        pushing = pushed != 0
         if pushing:
-            opponent_active_stones.remove(opponent_active_stone)
-            new_opponent_active_stone = active_stone_id + (length+1) * direction
-            if new_opponent_active_stone >= 0 and new_opponent_active_stone <= 15 and abs((active_stone_id + length * direction)%4 - (new_opponent_active_stone)%4) <= 1:
-                opponent_active_stones.add(active_stone_id + (length+1) * direction)
-            
-        next_to_move = opponent
-        next_actions = self.compute_actions(next_board, next_to_move)
-        next_utility = self.compute_utility(next_board, next_to_move, next_actions)
+            bits ^= (pushed | beyond) << opponent_offset
 
-        return ShobuState(to_move=next_to_move, utility=next_utility, board=next_board, actions=next_actions, count_boring_actions=0 if pushing else state.count_boring_actions+1)
+        return bits, pushing
 
 
     """
@@ -250,7 +556,7 @@ class ShobuGame:
         bool: True if the game has reached a terminal state, False otherwise.
     """
     def is_terminal(self, state):
-        return state.utility != 0 or state.count_boring_actions >= self.max_count_boring_actions
+        return state.count_boring_actions >= self.max_count_boring_actions or state.utility != 0
 
 
     """
@@ -303,65 +609,201 @@ class ShobuGame:
     Computes all legal actions for the given player on the current board.
 
     Args:
-        board (list): The game board represented as a list of sets.
+        bits (int): The bitboard position.
         player (int): The player number (0 or 1).
 
     Returns:
         list of ShobuAction: A list of all legal actions for the player.
     """
-    def compute_actions(self, board, player):
-        opponent = (player + 1) % 2
-        autorised_moves = ShobuGame.autorised_moves
-
+    def compute_actions(self, bits, player):
         actions = []
-        actions_append = actions.append
+        for _, segment in self.compute_segments(bits, player):
+            actions += segment
+        return actions
+
+
+    """
+    Computes the codes of all legal actions for the given player on the current board, in the
+    order of compute_actions.
+
+    Args:
+        bits (int): The bitboard position.
+        player (int): The player number (0 or 1).
+
+    Returns:
+        array of int: The codes (see encode_action) of all legal actions for the player, an array('H').
+    """
+    def compute_codes(self, bits, player):
+        codes = array('H')
+        for segment, _ in self.compute_segments(bits, player):
+            codes += segment
+        return codes
+
+
+    """
+    Returns the legal actions of the 4 pairs (passive board, active board) of the given player,
+    whose concatenation is the list of all legal actions.
+
+    The actions of a pair only depend on the stones of its 2 boards, so they are cached
+    (segment_cache) by (passive board, active board, stones of the passive board, stones of the
+    active board): in a search tree, most children share most of their boards.
 
+    Args:
+        bits (int): The bitboard position.
+        player (int): The player number (0 or 1).
+
+    Returns:
+        list of (array, list): The codes and the actions of each pair (see compute_segment).
+    """
+    def compute_segments(self, bits, player):
+        segment_cache = ShobuGame.segment_cache
+
+        segments = []
         for passive_board_j in range(2):
             passive_board_id = 2*player + passive_board_j
-            player_passive_stones = board[passive_board_id][player]
-            opponent_passive_stones = board[passive_board_id][opponent]
-            all_passive_stones = player_passive_stones.union(opponent_passive_stones)
-            passive_moves_dict = dict()
-            for player_passive_stone in player_passive_stones:
-                for direction, max_length in autorised_moves[player_passive_stone]:
-                    for length in range(1, max_length+1):
-                        if player_passive_stone + length * direction in all_passive_stones:
-                            break
-                        else:
-                            if (direction, length) in passive_moves_dict:
-                                passive_moves_dict[(direction, length)].append(player_passive_stone)
-                            else:
-                                passive_moves_dict[(direction, length)] = [player_passive_stone]
+            passive_board = bits >> 32 * passive_board_id & 0xFFFFFFFF
+            for active_board_i in range(2):
+                active_board_id = 2*active_board_i + (passive_board_j+1)%2
+                key = (passive_board_id, active_board_id, passive_board, bits >> 32 * active_board_id & 0xFFFFFFFF)
+                segment = segment_cache.get(key)
+                if segment is None:
+                    if len(segment_cache) >= ShobuGame.max_segment_cache:
+                        segment_cache.clear()
+                    segment = segment_cache[key] = self.compute_segment(bits, player, passive_board_id, active_board_id)
+                segments.append(segment)
+
+        return segments
+
+
+    """
+    Computes the legal actions of the given player with a passive move on one board and the
+    active move on another one.
+
+    The moves of each stone, direction and length are checked with their ray (see RAYS): the
+    squares of the path, and the square beyond it where a pushed stone lands.
+
+    Args:
+        bits (int): The bitboard position.
+        player (int): The player number (0 or 1).
+        passive_board_id (int): The board of the passive move (a home board of the player).
+        active_board_id (int): The board of the active move (of the other color).
+
+    Returns:
+        tuple: The codes of the legal actions with these boards (an array('H')) and the list of these actions.
+    """
+    def compute_segment(self, bits, player, passive_board_id, active_board_id):
+        opponent = (player + 1) % 2
+        player_passive_stones = bits >> 32 * passive_board_id + 16 * player & BOARD_MASK
+        all_passive_stones = player_passive_stones | bits >> 32 * passive_board_id + 16 * opponent & BOARD_MASK
+        player_active_stones = bits >> 32 * active_board_id + 16 * player & BOARD_MASK
+        opponent_active_stones = bits >> 32 * active_board_id + 16 * opponent & BOARD_MASK
+        all_active_stones = player_active_stones | opponent_active_stones
+        passive_squares = squares(player_passive_stones)
+        active_squares = squares(player_active_stones)
+
+        codes = []
+        for direction_index, direction in enumerate(DIRECTIONS):
+            for length_index in range(2):
+                # Passive stones: every square of the path must be empty. A stone which cannot
+                # move 1 square cannot move 2 either.
+                passive_stones = [stone for stone in passive_squares if RAYS[stone][direction_index][length_index] is not None
+                                  and not RAYS[stone][direction_index][length_index][0] & all_passive_stones]
+                if not passive_stones:
+                    break
+
+                # Active stones: no stone of the player on the path, and at most one opponent stone,
+                # pushed off the board or onto an empty square.
+                base = ACTION_BASES[passive_board_id, active_board_id, direction, length_index + 1]
+                for stone in active_squares:
+                    ray = RAYS[stone][direction_index][length_index]
+                    if ray is None:
+                        continue
+                    path, _, beyond = ray
+                    if path & player_active_stones:
+                        continue
+                    pushed = path & opponent_active_stones
+                    if pushed and (pushed & (pushed - 1) or beyond & all_active_stones):
+                        continue
+                    row = base + 16 * stone
+                    codes += [row + passive_stone for passive_stone in passive_stones]
+
+        return array('H', codes), [CODE_ACTIONS[code] for code in codes]
 
+
+    """
+    Checks if the given player has at least one legal action, without listing them.
+
+    A move of length 2 is only legal if the move of length 1 with the same stones and direction is,
+    so it is enough to find a direction in which a passive stone and an active stone of a valid pair
+    of boards can both move one square (see compute_segment).
+
+    Args:
+        bits (int): The bitboard position.
+        player (int): The player number (0 or 1).
+
+    Returns:
+        bool: True if the player has a legal action, False otherwise.
+    """
+    def has_actions(self, bits, player):
+        opponent = (player + 1) % 2
+        for passive_board_j in range(2):
+            passive_board_id = 2*player + passive_board_j
+            player_passive_stones = bits >> 32 * passive_board_id + 16 * player & BOARD_MASK
+            empty_passive = BOARD_MASK ^ (player_passive_stones | bits >> 32 * passive_board_id + 16 * opponent & BOARD_MASK)
             for active_board_i in range(2):
                 active_board_id = 2*active_board_i + (passive_board_j+1)%2
-                player_active_stones = board[active_board_id][player]
-                opponent_active_stones = board[active_board_id][opponent]
-                all_active_stones = player_active_stones.union(opponent_active_stones)
-                for player_active_stone in player_active_stones:
-                    for direction, max_length in autorised_moves[player_active_stone]:
-                        pushing = False
-                        moved_player_active_stone = player_active_stone
-                        for length in range(1, max_length+1):
-                            if (direction, length) not in passive_moves_dict:
-                                break
-                            moved_player_active_stone += direction
-                            if moved_player_active_stone in player_active_stones:
-                                break
-                            if not pushing and moved_player_active_stone in opponent_active_stones:
-                                pushing = True
-                            if pushing:
-                                moved_opponent_active_stone = moved_player_active_stone + direction
-                                if abs((moved_opponent_active_stone % 4) - (moved_player_active_stone % 4)) > 1 or moved_opponent_active_stone not in all_active_stones:
-                                    for passive_stone in passive_moves_dict[(direction, length)]:
-                                        actions_append(ShobuAction(passive_board_id, passive_stone, active_board_id, player_active_stone, direction, length))
-                                else:
-                                    break
-                            else:
-                                for passive_stone in passive_moves_dict[(direction, length)]:
-                                    actions_append(ShobuAction(passive_board_id, passive_stone, active_board_id, player_active_stone, direction, length))
+                player_active_stones = bits >> 32 * active_board_id + 16 * player & BOARD_MASK
+                opponent_active_stones = bits >> 32 * active_board_id + 16 * opponent & BOARD_MASK
+                all_active_stones = player_active_stones | opponent_active_stones
+                for direction, sources, left, right, back_sources in SHIFTS:
+                    if not ((player_passive_stones & sources) << left >> right) & empty_passive:
+                        continue
+                    blocked = (all_active_stones & back_sources) << right >> left
+                    first = (player_active_stones & sources) << left >> right
+                    if first & ~all_active_stones & BOARD_MASK or first & opponent_active_stones & ~blocked:
+                        return True
+        return False
 
-        return actions
+
+    """
+    Checks if an action is legal for the given player, in constant time with the squares of its
+    code (see CODE_MOVES): the action must be a valid action (see encode_action) with its passive
+    move on a home board of the player, the passive stone must move onto empty squares, and the
+    active stone must not pass through a stone of the player nor push more than one stone, the
+    pushed stone landing off the board or on an empty square.
+
+    Args:
+        bits (int): The bitboard position.
+        player (int): The player number (0 or 1).
+        action (ShobuAction): The action to check.
+
+    Returns:
+        bool: True if the action is legal, False otherwise.
+    """
+    def check_action(self, bits, player, action):
+        code = ACTION_CODES.get(action)
+        if code is None:
+            return False
+        move = CODE_MOVES[code]
+        if move is None or move[0] >> 1 != player:
+            return False
+        passive_board_id, passive_origin, passive_path, _, active_board_id, active_origin, active_path, _, beyond = move
+        opponent = (player + 1) % 2
+
+        # Passive move: a stone of the player, moving onto empty squares only.
+        passive_board = bits >> 32 * passive_board_id
+        if not passive_board >> 16 * player & passive_origin or passive_board & (passive_path | passive_path << 16):
+            return False
+
+        # Active move: a stone of the player, pushing at most one opponent stone.
+        player_stones = bits >> 32 * active_board_id + 16 * player & BOARD_MASK
+        if not player_stones & active_origin or player_stones & active_path:
+            return False
+        opponent_stones = bits >> 32 * active_board_id + 16 * opponent & BOARD_MASK
+        pushed = active_path & opponent_stones
+        if not pushed:
+            return True
+        return not pushed & (pushed - 1) and not beyond & (player_stones | opponent_stones)
 
 
     """
@@ -370,21 +812,26 @@ class ShobuGame:
     This method is used to evaluate the state for end-game conditions.
 
     Args:
-        board (list): The game board represented as a list of sets.
+        bits (int): The bitboard position.
         player (int): The player number (0 or 1).
-        actions (list of ShobuAction): The possible actions for the player.
+        actions (list of ShobuAction or None): The possible actions for the player, or None if they are not
+            computed yet (has_actions then checks that there is one, without listing them).
 
     Returns:
         int: The utility value of the board state for the player. -1 for a loss, 1 for a win, or 0 if the game continues or is a draw.
     """
-    def compute_utility(self, board, player, actions):
-        if len(actions) == 0:
+    def compute_utility(self, bits, player, actions=None):
+        if actions is None:
+            no_action = not self.has_actions(bits, player)
+        else:
+            no_action = len(actions) == 0
+        if no_action:
             return -1 if player == 0 else 1
 
-        for white_stones, black_stones in board:
-            if len(white_stones) == 0:
+        for board_id in range(4):
+            if bits >> 32 * board_id & BOARD_MASK == 0:
                 return -1
-            if len(black_stones) == 0:
+            if bits >> 32 * board_id + 16 & BOARD_MASK == 0:
                 return 1
         
-        return 0
\ No newline at end of file
+        return 0
@@ -0,0 +1,71 @@
+"""
+Micro-benchmark of Pacman.actions : expansions/sec with the moves walked
+cell by cell at each expansion (before) and with the precomputed move table
+(after), on the bundled instances and on large random grids.
+
+Run from the "Assignment 1" directory :
+
+> python Extra/bench_actions.py
+"""
+
+import os
+import sys
+import time
+from collections import deque
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "aima-python3"))
+
+from pacman import *
+from generate import generate_state
+
+
+class WalkPacman(Pacman):
+    """Pacman problem walking the grid at each expansion (previous behaviour)."""
+
+    def actions(self, state):
+        return slide_moves(state.grid, state.shape, state.pos_pacman)
+
+
+class WalkCompactPacman(CompactPacman):
+    """Compact problem walking the walls at each expansion (previous behaviour)."""
+
+    def actions(self, state):
+        return slide_moves(self.maze.walls, self.maze.shape, state.pos_pacman)
+
+
+def expansions_per_sec(problem, max_expansions=2000):
+    """Breadth-first graph expansion of (at most) max_expansions nodes."""
+    start = time.perf_counter()
+    frontier = deque([Node(problem.initial)])
+    explored = set()
+    expansions = 0
+    while frontier and expansions < max_expansions:
+        node = frontier.popleft()
+        if node.state in explored:
+            continue
+        explored.add(node.state)
+        expansions += 1
+        for child in node.expand(problem):
+            if child.state not in explored:
+                frontier.append(child)
+    return expansions / (time.perf_counter() - start)
+
+
+def bench(name, init_state):
+    rates = [expansions_per_sec(cls(init_state)) for cls in (WalkPacman, Pacman, WalkCompactPacman, CompactPacman)]
+    print("{:<12} {:>12.0f} {:>12.0f} {:>7.2f}x {:>12.0f} {:>12.0f} {:>7.2f}x".format(
+        name, rates[0], rates[1], rates[1] / rates[0], rates[2], rates[3], rates[3] / rates[2]))
+
+
+if __name__ == "__main__":
+    print("{:<12} {:>12} {:>12} {:>8} {:>12} {:>12} {:>8}".format(
+        "Instance", "grid/walk", "grid/table", "speedup", "compact/walk", "compact/tab", "speedup"))
+
+    for i in range(1, 11):
+        shape, initial_grid, initial_fruit_count = read_instance_file(os.path.join(ROOT, "Instances", "i{:02d}".format(i)))
+        bench("i{:02d}".format(i), State(shape, tuple(initial_grid), initial_fruit_count, "Init"))
+
+    for size in (30, 60, 120):
+        bench("{}x{}".format(size, size), generate_state(size, size, nb_fruits=8, seed=size))
@@ -0,0 +1,56 @@
+"""
+Peak memory (measured with tracemalloc) of the breadth-first graph search on
+the bundled instances, with the full grid states and with the compact states.
+
+Run from the "Assignment 1" directory :
+
+> python Extra/bench_memory.py
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "aima-python3"))
+
+from pacman import *
+
+
+class DictNode:
+    """Node with a __dict__ (previous layout), only used to compare the sizes."""
+
+    def __init__(self, state, parent=None, action=None, path_cost=0):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.path_cost = path_cost
+        self.depth = 0
+
+
+def peak_memory(problem, search=breadth_first_graph_search):
+    """Run the search and return (peak memory in KiB, time, explored nodes, frontier size)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    _, nb_explored, remaining_nodes = search(problem)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024, elapsed, nb_explored, remaining_nodes
+
+
+if __name__ == "__main__":
+    node, old_node = Node(None), DictNode(None)
+    print("Size of a node : {} bytes with __slots__, {} bytes with a __dict__\n".format(
+        sys.getsizeof(node), sys.getsizeof(old_node) + sys.getsizeof(old_node.__dict__)))
+
+    print("{:<10} {:>10} {:>10} {:>14} {:>14}".format("Instance", "Explored", "Frontier", "Grid (KiB)", "Compact (KiB)"))
+    for i in range(1, 11):
+        shape, initial_grid, initial_fruit_count = read_instance_file(os.path.join(ROOT, "Instances", "i{:02d}".format(i)))
+        init_state = State(shape, tuple(initial_grid), initial_fruit_count, "Init")
+        grid_peak, _, nb_explored, remaining_nodes = peak_memory(Pacman(init_state))
+        compact_peak, _, _, _ = peak_memory(CompactPacman(init_state))
+        print("{:<10} {:>10} {:>10} {:>14.1f} {:>14.1f}".format(
+            "i{:02d}".format(i), nb_explored, remaining_nodes, grid_peak, compact_peak))
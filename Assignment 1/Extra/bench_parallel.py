@@ -0,0 +1,38 @@
+"""
+Speedup of the level-synchronous parallel breadth-first search with 1, 2, 4
+and 8 worker processes, against the sequential breadth_first_graph_search,
+on generated instances.
+
+Run from the "Assignment 1" directory :
+
+> python Extra/bench_parallel.py
+"""
+
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "aima-python3"))
+
+from pacman import *
+from generate import generate_state
+
+WORKERS = [1, 2, 4, 8]
+
+
+if __name__ == "__main__":
+    print("CPUs : {}\n".format(os.cpu_count()))
+    print("{:<14} {:>6} {:>10} {:>10}".format("Instance", "Depth", "Explored", "Sequential")
+          + "".join(" {:>13}".format("{} workers".format(w)) for w in WORKERS))
+
+    for size, nb_fruits in ((30, 4), (40, 5), (60, 5)):
+        init_state = generate_state(size, size, nb_fruits, seed=size)
+        sequential = breadth_first_graph_search(CompactPacman(init_state))
+        line = "{:<14} {:>6} {:>10} {:>9.2f}s".format(
+            "{}x{} f{}".format(size, size, nb_fruits), sequential.node.depth, sequential.explored_nodes, sequential.elapsed)
+        for workers in WORKERS:
+            stats = parallel_breadth_first_search(CompactPacman(init_state), workers)
+            assert stats.node.depth == sequential.node.depth
+            line += " {:>6.2f}s {:>4.1f}x".format(stats.elapsed, sequential.elapsed / stats.elapsed)
+        print(line)
@@ -0,0 +1,139 @@
+"""
+Benchmark runner : solve every instance with every algorithm on a pool of
+worker processes (each worker imports the solver once and is reused), with
+warm-up and repeated runs, and write one CSV per algorithm in the format read
+by plot.py, plus spread and peak memory columns.
+
+Run from the "Assignment 1" directory, for example :
+
+> python Extra/evaluate.py -a bfs_graph dfs_graph ids -r 5 -j 4
+"""
+
+import argparse
+import os
+import signal
+import statistics
+import sys
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "aima-python3"))
+
+from pacman import *
+
+# Name of the CSV file of each algorithm (the names read by plot.py).
+CSV_NAMES = {
+    "bfs_graph": "BFS_Graph",
+    "bfs_tree": "BFS_Tree",
+    "dfs_graph": "DFS_Graph",
+    "dfs_tree": "DFS_Tree",
+    "ids": "IDS",
+    "ucs": "UCS",
+    "astar": "AStar",
+    "idastar": "IDAStar",
+    "held_karp": "HeldKarp",
+    "anytime": "Anytime",
+    "parallel_bfs": "Parallel_BFS",
+    "bfs_disk": "BFS_Disk",
+}
+
+HEADER = "Instance, Time, ExploredNodes, RemainingNodes, TimeMin, TimeMax, TimeStdev, PeakMemoryKiB, GeneratedNodes, MaxFrontier"
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def on_alarm(signum, frame):
+    raise SearchTimeout()
+
+
+def run_once(algorithm, init_state, compact, heuristic, trace_memory=False):
+    """Solve the instance once and return the SearchStats of the search."""
+    problem = CompactPacman(init_state) if compact else Pacman(init_state)
+    return get_search(algorithm, heuristic)(problem, stats=SearchStats(trace_memory=trace_memory))
+
+
+def run_task(algorithm, instance, repeats, warmup, compact, heuristic, timeout):
+    """
+    Run the warm-up runs, the timed runs and one run with tracemalloc (which
+    slows the search down, so it is not timed) of an algorithm on an instance.
+    Return a dict of the measures, or None if timeout is exceeded.
+    """
+    shape, initial_grid, initial_fruit_count = read_instance_file(instance)
+    init_state = State(shape, tuple(initial_grid), initial_fruit_count, "Init")
+
+    signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        for _ in range(warmup):
+            run_once(algorithm, init_state, compact, heuristic)
+        times = []
+        for _ in range(repeats):
+            stats = run_once(algorithm, init_state, compact, heuristic)
+            times.append(stats.elapsed)
+        peak = run_once(algorithm, init_state, compact, heuristic, trace_memory=True).peak_memory / 1024
+    except SearchTimeout:
+        return None
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    return {
+        "time": statistics.median(times),
+        "explored": stats.explored_nodes,
+        "remaining": stats.frontier_size,
+        "time_min": min(times),
+        "time_max": max(times),
+        "time_stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "peak_memory": peak,
+        "generated": stats.generated_nodes,
+        "max_frontier": stats.max_frontier,
+        "cost": None if stats.node is None else stats.node.path_cost,
+    }
+
+
+def csv_line(name, result):
+    """Format the result of run_task as a line of the CSV files."""
+    if result is None:
+        return "{}, Too Long :/".format(name)
+    return "{}, {time}, {explored}, {remaining}, {time_min}, {time_max}, {time_stdev}, {peak_memory:.1f}, {generated}, {max_frontier}".format(
+        name, **result)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pacman benchmark runner")
+    parser.add_argument("-a", "--algorithms", nargs="+", default=["bfs_graph", "bfs_tree", "dfs_graph", "ids"],
+                        choices=ALGORITHMS, help="Algorithms to evaluate")
+    parser.add_argument("-i", "--instances", nargs="+", default=None,
+                        help="Instance files (default: Instances/i01 .. i10)")
+    parser.add_argument("-r", "--repeats", type=int, default=5, help="Timed runs per instance")
+    parser.add_argument("-w", "--warmup", type=int, default=1, help="Untimed warm-up runs per instance")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument("-t", "--timeout", type=float, default=300, help="Time limit (in seconds) per algorithm and instance")
+    parser.add_argument("-c", "--compact", action="store_true", help="Use the compact (position, fruit bitmask) states")
+    parser.add_argument("-H", "--heuristic", type=str, default="mst", choices=["fruits", "line", "mst"],
+                        help="Heuristic used by the astar algorithm")
+    parser.add_argument("-o", "--output", type=str, default=os.path.join(ROOT, "Extra", "csv_evaluation"),
+                        help="Directory of the CSV files")
+    args = parser.parse_args()
+
+    instances = args.instances or [os.path.join(ROOT, "Instances", "i{:02d}".format(i)) for i in range(1, 11)]
+
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = {algorithm: [executor.submit(run_task, algorithm, instance, args.repeats, args.warmup,
+                                               args.compact, args.heuristic, args.timeout)
+                               for instance in instances]
+                   for algorithm in args.algorithms}
+
+        os.makedirs(args.output, exist_ok=True)
+        for algorithm, results in futures.items():
+            filename = os.path.join(args.output, CSV_NAMES[algorithm] + ".csv")
+            with open(filename, "w") as fd:
+                fd.write(HEADER + "\n")
+                for instance, future in zip(instances, results):
+                    fd.write(csv_line(os.path.basename(instance), future.result()) + "\n")
+            print("{} written to {}".format(CSV_NAMES[algorithm], filename))
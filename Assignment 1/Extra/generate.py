@@ -0,0 +1,96 @@
+"""
+Random Pacman instance generator.
+
+The instances are written in the format of read_instance_file (first line
+"<nbRows> <nbCols>", then the rows of the grid). The pacman is placed on a
+random free cell and the fruits only on cells reachable from it with the
+moves of the game, so every generated instance is solvable.
+
+Run from the "Assignment 1" directory, for example :
+
+> python Extra/generate.py 30 30 -f 8 -w 0.2 -n 5 --seed 1 -o Instances/generated
+"""
+
+import argparse
+import os
+import random
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "aima-python3"))
+
+from pacman import *
+
+
+def generate_grid(nbRows, nbCols, nb_fruits, wall_density=0.2, seed=0, max_draws=1000):
+    """
+    Return a solvable grid (tuple of rows) of the given size, with the given
+    proportion of walls and number of fruits. The walls are drawn again
+    (with the same random generator) until enough cells are reachable.
+    Raises ValueError if the parameters can't be met: more fruits than the
+    cells left by the pacman, a proportion of walls outside [0, 1), or no
+    suitable grid after max_draws draws.
+    """
+    if nb_fruits >= nbRows * nbCols:
+        raise ValueError("{} fruits don't fit in a {}x{} grid with the pacman".format(nb_fruits, nbRows, nbCols))
+    if not 0 <= wall_density < 1:
+        raise ValueError("Proportion of walls {} is not in [0, 1)".format(wall_density))
+    rng = random.Random(seed)
+    for _ in range(max_draws):
+        cells = [["#" if rng.random() < wall_density else "." for _ in range(nbCols)] for _ in range(nbRows)]
+        free = [(i, j) for i in range(nbRows) for j in range(nbCols) if cells[i][j] == "."]
+        if not free:
+            continue
+        start = rng.choice(free)
+        cells[start[0]][start[1]] = "P"
+        grid = tuple(tuple(row) for row in cells)
+
+        # Cells reachable from the pacman with the moves of the game.
+        problem = Pacman(State((nbRows, nbCols), grid, 0, "Init"))
+        reachable = sorted(cell for cell in problem.move_distances(start) if cell != start)
+        if len(reachable) < nb_fruits:
+            continue
+        for i, j in rng.sample(reachable, nb_fruits):
+            cells[i][j] = "F"
+        return tuple(tuple(row) for row in cells)
+    raise ValueError("No {}x{} grid with {} reachable fruits found in {} draws (proportion of walls {})"
+                     .format(nbRows, nbCols, nb_fruits, max_draws, wall_density))
+
+
+def generate_state(nbRows, nbCols, nb_fruits, wall_density=0.2, seed=0):
+    """Same as generate_grid, but return the initial State of the instance."""
+    grid = generate_grid(nbRows, nbCols, nb_fruits, wall_density, seed)
+    return State((nbRows, nbCols), grid, nb_fruits, "Init")
+
+
+def write_instance(filepath, grid):
+    """Write a grid in the instance file format."""
+    with open(filepath, "w") as fd:
+        fd.write("{} {}\n".format(len(grid), len(grid[0])))
+        for row in grid:
+            fd.write("".join(row) + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Random Pacman instance generator")
+    parser.add_argument("rows", type=int, help="Number of rows")
+    parser.add_argument("cols", type=int, help="Number of columns")
+    parser.add_argument("-f", "--fruits", type=int, default=4, help="Number of fruits")
+    parser.add_argument("-w", "--walls", type=float, default=0.2, help="Proportion of walls (0 to 1)")
+    parser.add_argument("-n", "--number", type=int, default=1, help="Number of instances")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first instance (incremented for the next ones)")
+    parser.add_argument("-o", "--output", type=str, default=os.path.join(ROOT, "Instances", "generated"),
+                        help="Output directory")
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    for k in range(args.number):
+        seed = args.seed + k
+        filepath = os.path.join(args.output, "g{}x{}_f{}_s{}".format(args.rows, args.cols, args.fruits, seed))
+        try:
+            grid = generate_grid(args.rows, args.cols, args.fruits, args.walls, seed)
+        except ValueError as error:
+            parser.error(str(error))
+        write_instance(filepath, grid)
+        print(filepath)
@@ -0,0 +1,120 @@
+"""
+Scaling benchmark : solve generated instances of increasing grid size (with a
+fixed number of fruits) and of increasing number of fruits (with a fixed grid
+size) with each algorithm, write the measures in csv_evaluation/Scaling.csv
+and plot the time and the number of explored nodes in Scaling_Size.pdf and
+Scaling_Fruits.pdf.
+
+Run from the "Assignment 1" directory, for example :
+
+> python Extra/scaling.py -a bfs_graph astar held_karp -n 3 -j 4
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib.pyplot as plt
+
+from evaluate import *
+from generate import generate_grid, write_instance
+
+colors = ["#FF5733", "#5F9EA0", "#FFD700", "#8A2BE2", "#32CD32", "#FF69B4", "#808080", "#000000"]
+
+
+def plot(points, algorithms, x_label, x_index, filename):
+    """Plot the mean time and explored nodes of each algorithm against points[x_index]."""
+    fig, (ax_time, ax_nodes) = plt.subplots(1, 2, figsize=(14, 6))
+
+    for color, algorithm in zip(colors, algorithms):
+        xs, times, nodes = [], [], []
+        for point, results in points.items():
+            results = results[algorithm]
+            # A point is only drawn if every instance was solved in time.
+            if all(result is not None for result in results):
+                xs.append(point[x_index])
+                times.append(statistics.mean(result["time"] for result in results))
+                nodes.append(statistics.mean(result["explored"] for result in results))
+        ax_time.plot(xs, times, marker='o', linestyle='-', color=color, label=CSV_NAMES[algorithm])
+        ax_nodes.plot(xs, nodes, marker='o', linestyle='-', color=color, label=CSV_NAMES[algorithm])
+
+    for ax, y_label in ((ax_time, "Execution time (s)"), (ax_nodes, "Explored nodes")):
+        ax.set_xlabel(x_label)
+        ax.set_ylabel(y_label)
+        ax.set_yscale('log')
+        ax.grid(True)
+        ax.legend(title="Algorithms", loc='upper left')
+
+    plt.tight_layout()
+    plt.savefig(filename)
+    plt.close(fig)
+    print("Plot written to", filename)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pacman scaling benchmark")
+    parser.add_argument("-a", "--algorithms", nargs="+", default=["bfs_graph", "dfs_graph", "ids", "astar", "held_karp"],
+                        choices=ALGORITHMS, help="Algorithms to evaluate")
+    parser.add_argument("-s", "--sizes", nargs="+", type=int, default=[10, 20, 30, 40, 60],
+                        help="Grid sizes (square grids) of the size sweep")
+    parser.add_argument("-f", "--fruits", nargs="+", type=int, default=[2, 4, 6, 8, 10, 12],
+                        help="Numbers of fruits of the fruit sweep")
+    parser.add_argument("--fixed-size", type=int, default=20, help="Grid size of the fruit sweep")
+    parser.add_argument("--fixed-fruits", type=int, default=4, help="Number of fruits of the size sweep")
+    parser.add_argument("-w", "--walls", type=float, default=0.2, help="Proportion of walls")
+    parser.add_argument("-n", "--number", type=int, default=3, help="Instances (seeds) per point")
+    parser.add_argument("-r", "--repeats", type=int, default=1, help="Timed runs per instance")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument("-t", "--timeout", type=float, default=60, help="Time limit (in seconds) per algorithm and instance")
+    parser.add_argument("-c", "--compact", action="store_true", help="Use the compact (position, fruit bitmask) states")
+    parser.add_argument("-H", "--heuristic", type=str, default="mst", choices=["fruits", "line", "mst"],
+                        help="Heuristic used by the astar and anytime algorithms")
+    parser.add_argument("-o", "--output", type=str, default=os.path.join(ROOT, "Extra"),
+                        help="Directory of the plots (the CSV goes to its csv_evaluation subdirectory)")
+    args = parser.parse_args()
+
+    # (rows, cols, fruits) of each point of the two sweeps.
+    size_points = [(size, size, args.fixed_fruits) for size in args.sizes]
+    fruit_points = [(args.fixed_size, args.fixed_size, nb_fruits) for nb_fruits in args.fruits]
+
+    with tempfile.TemporaryDirectory(prefix="pacman_scaling_") as instance_dir:
+        instances = {}
+        for rows, cols, nb_fruits in set(size_points + fruit_points):
+            for seed in range(args.number):
+                filepath = os.path.join(instance_dir, "g{}x{}_f{}_s{}".format(rows, cols, nb_fruits, seed))
+                try:
+                    grid = generate_grid(rows, cols, nb_fruits, args.walls, seed)
+                except ValueError as error:
+                    parser.error(str(error))
+                write_instance(filepath, grid)
+                instances[rows, cols, nb_fruits, seed] = filepath
+
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            futures = {(key, algorithm): executor.submit(run_task, algorithm, filepath, args.repeats, 0,
+                                                         args.compact, args.heuristic, args.timeout)
+                       for key, filepath in instances.items() for algorithm in args.algorithms}
+            results = {key: future.result() for key, future in futures.items()}
+
+    os.makedirs(os.path.join(args.output, "csv_evaluation"), exist_ok=True)
+    filename = os.path.join(args.output, "csv_evaluation", "Scaling.csv")
+    with open(filename, "w") as fd:
+        fd.write("Algorithm, Rows, Cols, Fruits, Seed, Time, ExploredNodes, Cost\n")
+        for ((rows, cols, nb_fruits, seed), algorithm), result in sorted(results.items()):
+            if result is None:
+                fd.write("{}, {}, {}, {}, {}, Too Long :/\n".format(CSV_NAMES[algorithm], rows, cols, nb_fruits, seed))
+            else:
+                fd.write("{}, {}, {}, {}, {}, {}, {}, {}\n".format(CSV_NAMES[algorithm], rows, cols, nb_fruits, seed,
+                                                                 result["time"], result["explored"], result["cost"]))
+    print("Measures written to", filename)
+
+    def by_point(points):
+        return {point: {algorithm: [results[point + (seed,), algorithm] for seed in range(args.number)]
+                        for algorithm in args.algorithms}
+                for point in points}
+
+    plot(by_point(size_points), args.algorithms, "Grid size (rows = columns), {} fruits".format(args.fixed_fruits), 0,
+         os.path.join(args.output, "Scaling_Size.pdf"))
+    plot(by_point(fruit_points), args.algorithms, "Number of fruits, {0}x{0} grid".format(args.fixed_size), 2,
+         os.path.join(args.output, "Scaling_Fruits.pdf"))
@@ -6,7 +6,21 @@ then create problem instances and solve them with calls to the various search
 functions.
 """
 
+import bisect
+import hashlib
+import heapq
+import math
+import mmap
+import multiprocessing
+import os
+import pickle
+import shutil
+import struct
 import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
 from collections import deque
 
 from utils import *
@@ -62,6 +76,16 @@ class Problem:
         and related algorithms try to maximize this value."""
         raise NotImplementedError
 
+    def encode_state(self, state):
+        """Return the state as bytes, for the searches writing states to
+        disk. Equal states must give equal bytes. The default method pickles
+        the state; override it with a more compact encoding if possible."""
+        return pickle.dumps(state)
+
+    def decode_state(self, data):
+        """Return the state encoded by encode_state."""
+        return pickle.loads(data)
+
 
 # ______________________________________________________________________________
 
@@ -74,7 +98,12 @@ class Node:
     the total path_cost (also known as g) to reach the node. Other functions
     may add an f and h value; see best_first_graph_search and astar_search for
     an explanation of how the f and h values are handled. You will not need to
-    subclass this class."""
+    subclass this class.
+    Nodes use __slots__ (no per-node __dict__): the graph searches keep
+    millions of them alive, and the path to the root is only rebuilt on demand
+    by path() and solution(). f and h are the slots used by memoize."""
+
+    __slots__ = ('state', 'parent', 'action', 'path_cost', 'depth', 'f', 'h')
 
     def __init__(self, state, parent=None, action=None, path_cost=0):
         """Create a search tree Node, derived from a parent by an action."""
@@ -172,10 +201,103 @@ class SimpleProblemSolvingAgentProgram:
         raise NotImplementedError
 
 
+# ______________________________________________________________________________
+# Search statistics
+
+
+class SearchStats:
+    """Result of a search: the goal node (None if no solution was found) and
+    the statistics collected while searching. Every search function returns
+    one; pass your own instance as the stats argument to enable the optional
+    counters:
+        - per_depth: count the explored nodes per depth (dict depth -> count)
+        - trace_memory: measure the peak memory with tracemalloc (slower)
+    For backward compatibility, a SearchStats unpacks as the former
+    (node, explored_nodes, frontier_size) tuple."""
+
+    def __init__(self, per_depth=False, trace_memory=False):
+        self.node = None
+        self.explored_nodes = 0  # Expanded nodes, plus the goal or cutoff nodes examined
+        self.generated_nodes = 0  # Children created
+        self.duplicates = 0  # Children or nodes pruned because their state was already seen
+        self.frontier_size = 0  # Size of the frontier when the search stopped
+        self.max_frontier = 0  # Peak size of the frontier
+        self.peak_memory = None  # Bytes, if trace_memory
+        self.elapsed = 0.0  # Seconds
+        self.per_depth = {} if per_depth else None
+        self.iterations = []  # (limit, explored nodes, cumulative explored nodes), iterative searches only
+        self.cache_hits = 0  # Heuristic values found in the StateCache
+        self.cache_misses = 0  # Heuristic values computed
+        self.trace_memory = trace_memory
+        self.tracing = False  # Whether start began the tracing (stop then ends it)
+        self.started = None
+
+    def start(self):
+        """Start the timer (and the memory tracing). Nested calls are ignored,
+        except that they trace again after a stop that ended the tracing (an
+        iterative search calling a search once per iteration)."""
+        if self.trace_memory:
+            if self.started is None and tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            elif not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.tracing = True
+        if self.started is None:
+            self.started = time.perf_counter()
+        return self
+
+    def reset(self):
+        """Clear the result, the counters and the timer (keeping the options)
+        for a new search, and return self."""
+        if self.tracing:
+            tracemalloc.stop()
+        self.__init__(per_depth=self.per_depth is not None, trace_memory=self.trace_memory)
+        return self
+
+    def stop(self, node, frontier_size):
+        """Record the result of the search and return self."""
+        self.node = node
+        self.frontier_size = frontier_size
+        self.max_frontier = max(self.max_frontier, frontier_size)
+        self.elapsed = time.perf_counter() - self.started
+        if self.trace_memory and tracemalloc.is_tracing():
+            self.peak_memory = max(self.peak_memory or 0, tracemalloc.get_traced_memory()[1])
+            if self.tracing:
+                tracemalloc.stop()
+                self.tracing = False
+        return self
+
+    def visit(self, node):
+        """Count node as explored (expanded, or a goal or a cutoff node
+        examined without being expanded)."""
+        self.explored_nodes += 1
+        if self.per_depth is not None:
+            self.per_depth[node.depth] = self.per_depth.get(node.depth, 0) + 1
+
+    def expand(self, node, children):
+        """Count the expansion of node into children."""
+        self.visit(node)
+        self.generated_nodes += len(children)
+
+    def count_cache(self, cache):
+        """Record the hits and misses of a StateCache (if any) and return self."""
+        if cache is not None:
+            self.cache_hits = cache.hits
+            self.cache_misses = cache.misses
+        return self
+
+    def __iter__(self):
+        return iter((self.node, self.explored_nodes, self.frontier_size))
+
+    def __repr__(self):
+        return ("<SearchStats explored={} generated={} duplicates={} max_frontier={} elapsed={:.4f}s>"
+                .format(self.explored_nodes, self.generated_nodes, self.duplicates, self.max_frontier, self.elapsed))
+
+
 # ______________________________________________________________________________
 # Uninformed Search algorithms
 
-def breadth_first_tree_search(problem):
+def breadth_first_tree_search(problem, stats=None):
     """
     [Figure 3.7]
     Search the shallowest nodes in the search tree first.
@@ -183,20 +305,23 @@ def breadth_first_tree_search(problem):
     The argument frontier should be an empty queue.
     Repeats infinitely in case of loops.
     """
+    stats = (stats or SearchStats()).start()
 
     frontier = deque([Node(problem.initial)])  # FIFO queue
 
-    explored_nodes = 0
     while frontier:
         node = frontier.popleft()
-        explored_nodes += 1
         if problem.goal_test(node.state):
-            return node, explored_nodes, len(frontier)
-        frontier.extend(node.expand(problem))
-    return None, explored_nodes, len(frontier)
+            stats.visit(node)
+            return stats.stop(node, len(frontier))
+        children = node.expand(problem)
+        stats.expand(node, children)
+        frontier.extend(children)
+        stats.max_frontier = max(stats.max_frontier, len(frontier))
+    return stats.stop(None, len(frontier))
 
 
-def depth_first_tree_search(problem):
+def depth_first_tree_search(problem, stats=None):
     """
     [Figure 3.7]
     Search the deepest nodes in the search tree first.
@@ -204,20 +329,23 @@ def depth_first_tree_search(problem):
     The argument frontier should be an empty queue.
     Repeats infinitely in case of loops.
     """
+    stats = (stats or SearchStats()).start()
 
     frontier = [Node(problem.initial)]  # Stack
 
-    explored_nodes = 0
     while frontier:
         node = frontier.pop()
-        explored_nodes += 1
         if problem.goal_test(node.state):
-            return node, explored_nodes, len(frontier)
-        frontier.extend(node.expand(problem))
-    return None, explored_nodes, len(frontier)
+            stats.visit(node)
+            return stats.stop(node, len(frontier))
+        children = node.expand(problem)
+        stats.expand(node, children)
+        frontier.extend(children)
+        stats.max_frontier = max(stats.max_frontier, len(frontier))
+    return stats.stop(None, len(frontier))
 
 
-def depth_first_graph_search(problem):
+def depth_first_graph_search(problem, stats=None):
     """
     [Figure 3.7]
     Search the deepest nodes in the search tree first.
@@ -225,170 +353,886 @@ def depth_first_graph_search(problem):
     The argument frontier should be an empty queue.
     Does not get trapped by loops.
     If two paths reach a state, only use the first one.
+    The states of the stack are indexed in a set, so that the
+    "already in the frontier" test is O(1) instead of a scan of the stack.
     """
-    frontier = [(Node(problem.initial))]  # Stack
+    stats = (stats or SearchStats()).start()
+    node = Node(problem.initial)
+    frontier = [node]  # Stack
+    in_frontier = {node.state}  # States of the nodes in the stack
 
     explored = set()
-    explored_nodes = 0
     while frontier:
         node = frontier.pop()
-        explored_nodes += 1
+        in_frontier.discard(node.state)
         if problem.goal_test(node.state):
-            return node, explored_nodes, len(frontier)
+            stats.visit(node)
+            return stats.stop(node, len(frontier))
         explored.add(node.state)
-        frontier.extend(child for child in node.expand(problem)
-                        if child.state not in explored and child not in frontier)
-    return None, explored_nodes, len(frontier)
+        children = node.expand(problem)
+        stats.expand(node, children)
+        for child in children:
+            if child.state not in explored and child.state not in in_frontier:
+                frontier.append(child)
+                in_frontier.add(child.state)
+            else:
+                stats.duplicates += 1
+        stats.max_frontier = max(stats.max_frontier, len(frontier))
+    return stats.stop(None, len(frontier))
 
-def breadth_first_graph_search(problem):
+def breadth_first_graph_search(problem, stats=None):
     """[Figure 3.11]
     Note that this function can be implemented in a
     single line as below:
     return graph_search(problem, FIFOQueue())
     """
+    stats = (stats or SearchStats()).start()
     node = Node(problem.initial)
     if problem.goal_test(node.state):
-        return node
+        return stats.stop(node, 0)
     frontier = deque([node])
     explored = dict()
-    explored_nodes = 0
     while frontier:
         node = frontier.popleft()
-        if node.state in explored: 
+        if node.state in explored:
+            stats.duplicates += 1
             continue
-        explored_nodes += 1
         explored[node.state] = True
-        for child in node.expand(problem):
-            # if hash(child.state) in explored.keys():
-                # print("visited alredy")
+        children = node.expand(problem)
+        stats.expand(node, children)
+        for child in children:
             if child.state not in explored:
                 if problem.goal_test(child.state):
-                    return child, explored_nodes, len(frontier)
+                    return stats.stop(child, len(frontier))
                 frontier.append(child)
-    return None, explored_nodes, len(frontier)
+            else:
+                stats.duplicates += 1
+        stats.max_frontier = max(stats.max_frontier, len(frontier))
+    return stats.stop(None, len(frontier))
 
 
-def best_first_graph_search(problem, f, display=False):
+def best_first_graph_search(problem, f, display=False, stats=None):
     """Search the nodes with the lowest f scores first.
     You specify the function f(node) that you want to minimize; for example,
     if f is a heuristic estimate to the goal, then we have greedy best
     first search; if f is node.depth then we have breadth-first search.
     There is a subtlety: the line "f = memoize(f, 'f')" means that the f
     values will be cached on the nodes as they are computed. So after doing
-    a best first search you can examine the f values of the path returned."""
+    a best first search you can examine the f values of the path returned.
+    The frontier is an IndexedPriorityQueue: membership tests and updates of
+    a child already in the frontier do not scan the heap, and ties on f are
+    broken by insertion order (states do not need to define __lt__).
+    If f is a StateCache, its hits and misses are recorded in stats."""
+    stats = (stats or SearchStats()).start()
+    cache = f if isinstance(f, StateCache) else None
     f = memoize(f, 'f')
     node = Node(problem.initial)
-    frontier = PriorityQueue('min', f)
+    frontier = IndexedPriorityQueue('min', f)
     frontier.append(node)
     explored = set()
-    explored_nodes = 0
 
     while frontier:
         node = frontier.pop()
-        explored_nodes += 1
         if problem.goal_test(node.state):
+            stats.visit(node)
             if display:
                 print(len(explored), "paths have been expanded and", len(frontier), "paths remain in the frontier")
-            return node, explored_nodes, len(frontier)
+            return stats.stop(node, len(frontier)).count_cache(cache)
         explored.add(node.state)
-        for child in node.expand(problem):
+        children = node.expand(problem)
+        stats.expand(node, children)
+        for child in children:
             if child.state not in explored and child not in frontier:
                 frontier.append(child)
             elif child in frontier:
                 if f(child) < frontier[child]:
                     del frontier[child]
                     frontier.append(child)
-    return None, explored_nodes, len(frontier)
+                else:
+                    stats.duplicates += 1
+            else:
+                stats.duplicates += 1
+        stats.max_frontier = max(stats.max_frontier, len(frontier))
+    return stats.stop(None, len(frontier)).count_cache(cache)
+
+
+class NonIntegerStepCost(ValueError):
+    """Raised by bucket_uniform_cost_search on a step cost that its bucket
+    queue can't handle."""
+
+
+def uniform_cost_search(problem, display=False, stats=None):
+    """[Figure 3.14]
+    Uses the bucket queue of bucket_uniform_cost_search when the step costs
+    are small non-negative integers, and falls back to the heap-based
+    best_first_graph_search as soon as a step cost is not (the statistics are
+    then reset, so they only describe the heap-based search)."""
+    try:
+        return bucket_uniform_cost_search(problem, display=display, stats=stats)
+    except NonIntegerStepCost:
+        if display:
+            print("Step costs are not small integers, falling back to the priority queue")
+        return best_first_graph_search(problem, lambda node: node.path_cost, display,
+                                       stats and stats.reset())
+
+
+def bucket_uniform_cost_search(problem, max_step=64, display=False, stats=None):
+    """Uniform cost search for integer step costs between 0 and max_step
+    (Dial's algorithm). The frontier is a circular array of max_step + 1
+    buckets indexed by path cost, so push and pop are O(1) instead of
+    O(log n) for a heap; nodes of equal cost are popped in FIFO order.
+    A cheaper path to a state already in the frontier pushes a new node and
+    the old one is skipped when popped (lazy deletion).
+    Raises NonIntegerStepCost on a step cost that is not an integer in
+    [0, max_step]."""
+    stats = (stats or SearchStats()).start()
+    node = Node(problem.initial)
+    buckets = [deque() for _ in range(max_step + 1)]
+    buckets[0].append(node)
+    frontier_size = 1
+    best_cost = {node.state: 0}  # Cheapest path cost found for each state in the frontier
+    explored = set()
+    cost = 0
 
+    while frontier_size:
+        bucket = buckets[cost % (max_step + 1)]
+        if not bucket:
+            cost += 1
+            continue
+        node = bucket.popleft()
+        frontier_size -= 1
+        if node.state in explored or node.path_cost > best_cost[node.state]:
+            stats.duplicates += 1
+            continue
+        if problem.goal_test(node.state):
+            stats.visit(node)
+            if display:
+                print(len(explored), "paths have been expanded and", frontier_size, "paths remain in the frontier")
+            return stats.stop(node, frontier_size)
+        explored.add(node.state)
+        children = node.expand(problem)
+        stats.expand(node, children)
+        for child in children:
+            step = child.path_cost - node.path_cost
+            if not (isinstance(step, int) or (math.isfinite(step) and float(step).is_integer())) \
+                    or not 0 <= step <= max_step:
+                raise NonIntegerStepCost("Step cost {} is not an integer in [0, {}]".format(step, max_step))
+            if child.state in explored or child.path_cost >= best_cost.get(child.state, np.inf):
+                stats.duplicates += 1
+                continue
+            best_cost[child.state] = child.path_cost
+            buckets[int(child.path_cost) % (max_step + 1)].append(child)
+            frontier_size += 1
+        stats.max_frontier = max(stats.max_frontier, frontier_size)
+    return stats.stop(None, frontier_size)
+
+def depth_limited_search(problem, limit=50, stats=None):
+    """[Figure 3.17]
+    Iterative version: the recursion is replaced by an explicit stack, so the
+    limit is not bounded by the recursion limit of Python. A node whose state
+    was already expanded in this search with at least as many remaining moves
+    is skipped (transposition check on (state, remaining depth)), its subtree
+    having already been searched.
+    stats.node is the goal node, 'cutoff' if the limit was reached somewhere,
+    or None if there is no solution."""
+    stats = (stats or SearchStats()).start()
+    frontier = [Node(problem.initial)]  # Stack
+    explored = dict()  # State -> largest remaining depth it was expanded with
+    cutoff_occurred = False
+    while frontier:
+        node = frontier.pop()
+        remaining = limit - node.depth
+        if explored.get(node.state, -1) >= remaining:
+            stats.duplicates += 1
+            continue
+        explored[node.state] = remaining
+        if problem.goal_test(node.state):
+            stats.visit(node)
+            return stats.stop(node, len(frontier))
+        if remaining == 0:
+            stats.visit(node)
+            cutoff_occurred = True
+            continue
+        children = node.expand(problem)
+        stats.expand(node, children)
+        # Reversed, so that the children are searched in the order of the actions.
+        for child in reversed(children):
+            if explored.get(child.state, -1) < remaining - 1:
+                frontier.append(child)
+            else:
+                stats.duplicates += 1
+        stats.max_frontier = max(stats.max_frontier, len(frontier))
+    return stats.stop('cutoff' if cutoff_occurred else None, 0)
 
-def uniform_cost_search(problem, display=False):
-    """[Figure 3.14]"""
-    return best_first_graph_search(problem, lambda node: node.path_cost, display)
 
-def depth_limited_search(problem, limit=50):
-    """[Figure 3.17]"""
-    print("hg")
-    explored_nodes = 0
-    def recursive_dls(node, problem, limit, explored_nodes):
-        explored_nodes += 1
-        if problem.goal_test(node.state):
-            return node, explored_nodes
-        elif limit == 0:
-            return 'cutoff'
-        else:
-            cutoff_occurred = False
-            for child in node.expand(problem):
-                result = recursive_dls(child, problem, limit - 1, explored_nodes)
-                if result == 'cutoff':
-                    cutoff_occurred = True
-                elif result is not None:
-                    return result
-            return 'cutoff' if cutoff_occurred else None
-
-    # Body of depth_limited_search:
-    return recursive_dls(Node(problem.initial), problem, limit, explored_nodes)
-
-def iterative_deepening_search(problem):
-    """[Figure 3.18]"""
+def iterative_deepening_search(problem, stats=None):
+    """[Figure 3.18]
+    The statistics are summed over all the iterations, and a (limit, explored
+    nodes in the iteration, cumulative explored nodes) tuple is appended to
+    stats.iterations after each iteration."""
+    stats = (stats or SearchStats()).start()
     for depth in range(sys.maxsize):
-        result = depth_limited_search(problem, depth)
-        if result != 'cutoff':
-            return result
+        explored_before = stats.explored_nodes
+        depth_limited_search(problem, depth, stats)
+        stats.iterations.append((depth, stats.explored_nodes - explored_before, stats.explored_nodes))
+        if stats.node != 'cutoff':
+            return stats
+
+
+def _parallel_bfs_worker(problem, index, workers, connection, inboxes):
+    """Worker of parallel_breadth_first_search, owning the states s such that
+    hash(s) % workers == index. It keeps the parent of each of its visited
+    states and, at each level, expands its part of the frontier, sends the
+    children owned by each other worker directly to the inbox of that worker
+    and inserts the new ones among the children it receives into its next
+    level. Only the counters and the goal go back to the coordinator."""
+    visited = dict()  # State -> (parent state, action)
+    frontier = []
+    if hash(problem.initial) % workers == index:
+        visited[problem.initial] = (None, None)
+        frontier.append(problem.initial)
+    while True:
+        command, data = connection.recv()
+        if command == 'expand':
+            # Shard the children by owner, without the duplicates of the level.
+            buckets = [dict() for _ in range(workers)]  # Child -> (parent state, action)
+            goal = None
+            generated = duplicates = 0
+            for state in frontier:
+                for action in problem.actions(state):
+                    child = problem.result(state, action)
+                    generated += 1
+                    owner = hash(child) % workers
+                    if child in buckets[owner] or owner == index and child in visited:
+                        duplicates += 1
+                        continue
+                    if goal is None and problem.goal_test(child):
+                        goal = (child, state, action)
+                    buckets[owner][child] = (state, action)
+            for owner, bucket in enumerate(buckets):
+                if owner != index:
+                    inboxes[owner].put(list(bucket.items()))
+
+            # Every other worker sends one shard per level: keep the new children as next level.
+            expanded = len(frontier)
+            frontier = []
+            shards = [buckets[index].items()] + [inboxes[index].get() for _ in range(workers - 1)]
+            for shard in shards:
+                for child, parent in shard:
+                    if child in visited:
+                        duplicates += 1
+                        continue
+                    visited[child] = parent
+                    frontier.append(child)
+            connection.send((goal, expanded, generated, duplicates, len(frontier)))
+        elif command == 'parent':
+            connection.send(visited[data])
+        else:
+            connection.close()
+            return
+
+
+def parallel_breadth_first_search(problem, workers=4, stats=None):
+    """Level-synchronous breadth-first graph search on worker processes.
+    The visited states are partitioned by hash between the workers. At each
+    level every worker expands its part of the frontier and sends the
+    children to the workers owning them (one inbox queue per worker), which
+    remove the duplicates; the coordinating process only starts the levels
+    and sums the counters the workers report. The first level containing a
+    goal gives the optimal depth; the path is then rebuilt by asking the
+    owners for the parent of each state, and replayed from the initial state
+    so that the returned node is a regular Node.
+    The workers are forked (they inherit the problem and the hash seed of
+    the strings, needed for all processes to agree on the owner of a state),
+    so this search is only available on platforms supporting fork."""
+    stats = (stats or SearchStats()).start()
+    root = Node(problem.initial)
+    if problem.goal_test(root.state):
+        return stats.stop(root, 0)
+
+    context = multiprocessing.get_context('fork')
+    inboxes = [context.Queue() for _ in range(workers)]
+    connections, processes = [], []
+    for index in range(workers):
+        parent_end, child_end = context.Pipe()
+        process = context.Process(target=_parallel_bfs_worker, args=(problem, index, workers, child_end, inboxes),
+                                  daemon=True)
+        process.start()
+        connections.append(parent_end)
+        processes.append(process)
+
+    try:
+        goal = None
+        frontier_size = 1
+        depth = 0  # Depth of the level being expanded
+        while goal is None and frontier_size > 0:
+            for connection in connections:
+                connection.send(('expand', None))
+            frontier_size = 0
+            for connection in connections:
+                worker_goal, expanded, generated, duplicates, new_states = connection.recv()
+                stats.explored_nodes += expanded
+                if stats.per_depth is not None and expanded:
+                    stats.per_depth[depth] = stats.per_depth.get(depth, 0) + expanded
+                stats.generated_nodes += generated
+                stats.duplicates += duplicates
+                goal = goal or worker_goal
+                frontier_size += new_states
+            stats.max_frontier = max(stats.max_frontier, frontier_size)
+            depth += 1
+
+        if goal is None:
+            return stats.stop(None, 0)
+
+        # Rebuild the actions from the goal back to the initial state.
+        _, state, action = goal
+        actions = [action]
+        while state != root.state:
+            connection = connections[hash(state) % workers]
+            connection.send(('parent', state))
+            state, action = connection.recv()
+            actions.append(action)
+    finally:
+        for connection in connections:
+            try:
+                connection.send(('stop', None))
+            except (BrokenPipeError, OSError):
+                pass  # The worker already died, the exception being handled tells why
+        for process in processes:
+            # A worker interrupted in the middle of a level may wait for shards forever.
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+    node = root
+    for action in reversed(actions):
+        node = node.child_node(problem, action)
+    return stats.stop(node, frontier_size)
+
+
+# ______________________________________________________________________________
+# Memory-bounded search
+
+
+def fingerprint(data):
+    """64-bit fingerprint of an encoded state. Unlike hash, it is the same in
+    every process, so it can be written to disk and read back by a resumed
+    search."""
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+class SpillQueue:
+    """FIFO queue of byte strings keeping about max_bytes of them in memory.
+    The items are popped from head and pushed to tail; when tail grows over
+    max_bytes it is written to a new segment file, and the segments are read
+    back, oldest first, when head is empty, and deleted once read unless the
+    last checkpoint references them (they are then deleted by
+    discard_consumed, after the next one). A segment file is the sequence of
+    its items, each preceded by its length (4 bytes)."""
+
+    LENGTH = struct.Struct('<I')
+
+    def __init__(self, directory, max_bytes, segments=(), next_id=0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.head = deque()
+        self.tail = []
+        self.tail_bytes = 0
+        self.segments = deque(segments)  # (file name, number of items), oldest first
+        self.consumed = []  # Segments of the last checkpoint read back since it was written
+        self.checkpointed = {name for name, _ in self.segments}  # Segments of the last checkpoint
+        self.next_id = next_id
+        self.size = sum(count for _, count in self.segments)
+
+    def __len__(self):
+        return self.size
+
+    def append(self, item):
+        self.tail.append(item)
+        self.tail_bytes += len(item) + 41  # Size of a bytes object and of its list slot
+        self.size += 1
+        if self.tail_bytes > self.max_bytes:
+            self.segments.append(self.write(self.tail))
+            self.tail = []
+            self.tail_bytes = 0
+
+    def popleft(self):
+        if not self.head:
+            if self.segments:
+                name, _ = self.segments.popleft()
+                self.head = deque(self.read(name))
+                if name in self.checkpointed:
+                    self.consumed.append(name)
+                else:
+                    os.remove(os.path.join(self.directory, name))
+            else:
+                self.head = deque(self.tail)
+                self.tail = []
+                self.tail_bytes = 0
+        item = self.head.popleft()
+        self.size -= 1
+        return item
+
+    def write(self, items):
+        """Write items to a new segment file and return (its name, len(items))."""
+        name = 'frontier_{:06d}.seg'.format(self.next_id)
+        self.next_id += 1
+        with open(os.path.join(self.directory, name), 'wb') as fd:
+            fd.write(b''.join(self.LENGTH.pack(len(item)) + item for item in items))
+        return name, len(items)
+
+    def read(self, name):
+        """Return the items of a segment file."""
+        with open(os.path.join(self.directory, name), 'rb') as fd:
+            data = fd.read()
+        items = []
+        offset = 0
+        while offset < len(data):
+            length, = self.LENGTH.unpack_from(data, offset)
+            offset += self.LENGTH.size
+            items.append(data[offset:offset + length])
+            offset += length
+        return items
+
+    def flush(self):
+        """Write all the items kept in memory to segment files."""
+        if self.head:
+            self.segments.appendleft(self.write(self.head))
+            self.head = deque()
+        if self.tail:
+            self.segments.append(self.write(self.tail))
+            self.tail = []
+            self.tail_bytes = 0
+
+    def discard_consumed(self):
+        """Called once a new checkpoint of the segments is written: delete the
+        segment files of the previous one read back since."""
+        for name in self.consumed:
+            os.remove(os.path.join(self.directory, name))
+        self.consumed = []
+        self.checkpointed = {name for name, _ in self.segments}
+
+
+class FingerprintSet:
+    """Set of 64-bit fingerprints keeping at most max_items of them in memory.
+    When the in-memory set is full it is written, sorted, to a run file; the
+    runs are memory-mapped and searched by bisection (so the operating system
+    decides which of their pages stay in memory), and merged into a single
+    run when there are more than max_runs of them. The merged runs are deleted
+    unless the last checkpoint references them (they are then deleted by
+    discard_obsolete, after the next one)."""
+
+    def __init__(self, directory, max_items, runs=(), next_id=0, max_runs=8):
+        self.directory = directory
+        self.max_items = max_items
+        self.max_runs = max_runs
+        self.memory = set()
+        self.runs = []  # (file name, mmap, memoryview of the sorted fingerprints)
+        self.obsolete = []  # Runs of the last checkpoint merged since it was written
+        self.checkpointed = set(runs)  # Runs of the last checkpoint
+        self.next_id = next_id
+        for name in runs:
+            self.open(name)
+
+    def __contains__(self, fp):
+        if fp in self.memory:
+            return True
+        for _, _, view in self.runs:
+            i = bisect.bisect_left(view, fp)
+            if i < len(view) and view[i] == fp:
+                return True
+        return False
+
+    def add(self, fp):
+        self.memory.add(fp)
+        if len(self.memory) >= self.max_items:
+            self.spill()
+
+    def new_name(self):
+        name = 'visited_{:06d}.run'.format(self.next_id)
+        self.next_id += 1
+        return name
+
+    def open(self, name):
+        with open(os.path.join(self.directory, name), 'rb') as fd:
+            mapping = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+        self.runs.append((name, mapping, memoryview(mapping).cast('Q')))
+
+    def spill(self):
+        """Write the in-memory fingerprints to a new run."""
+        if not self.memory:
+            return
+        name = self.new_name()
+        with open(os.path.join(self.directory, name), 'wb') as fd:
+            array('Q', sorted(self.memory)).tofile(fd)
+        self.memory = set()
+        self.open(name)
+        if len(self.runs) > self.max_runs:
+            self.merge()
+
+    def merge(self):
+        """Merge all the runs into one (the runs are disjoint)."""
+        name = self.new_name()
+        with open(os.path.join(self.directory, name), 'wb') as fd:
+            buffer = array('Q')
+            for fp in heapq.merge(*(view for _, _, view in self.runs)):
+                buffer.append(fp)
+                if len(buffer) == 65536:
+                    buffer.tofile(fd)
+                    buffer = array('Q')
+            buffer.tofile(fd)
+        merged = [run[0] for run in self.runs]
+        self.close()
+        self.open(name)
+        for merged_name in merged:
+            if merged_name in self.checkpointed:
+                self.obsolete.append(merged_name)
+            else:
+                os.remove(os.path.join(self.directory, merged_name))
+
+    def discard_obsolete(self):
+        """Called once a new checkpoint of the runs is written: delete the run
+        files of the previous one merged since."""
+        for name in self.obsolete:
+            os.remove(os.path.join(self.directory, name))
+        self.obsolete = []
+        self.checkpointed = {name for name, _, _ in self.runs}
+
+    def close(self):
+        for _, mapping, view in self.runs:
+            view.release()
+            mapping.close()
+        self.runs = []
+
+
+def _read_path(filename, fp):
+    """Return the indices of the actions leading from the root to the state
+    of fingerprint fp, read from the parents log of
+    memory_bounded_breadth_first_search. A parent is always logged before
+    its children, so the log is read once, backwards."""
+    entry = struct.Struct('<QQI')
+    indices = []
+    with open(filename, 'rb') as fd:
+        end = fd.seek(0, os.SEEK_END)
+        while end > 0:
+            start = max(0, end - 4096 * entry.size)
+            fd.seek(start)
+            for state_fp, parent_fp, index in reversed(list(entry.iter_unpack(fd.read(end - start)))):
+                if state_fp == fp:
+                    if parent_fp == fp:  # Root
+                        return indices[::-1]
+                    indices.append(index)
+                    fp = parent_fp
+            end = start
+    raise ValueError("The parents log {} is incomplete".format(filename))
+
+
+def memory_bounded_breadth_first_search(problem, directory=None, memory_limit=256 * 2 ** 20,
+                                        checkpoint_interval=60, resume=False, stats=None):
+    """Breadth-first graph search keeping about memory_limit bytes of frontier
+    and visited states in memory, the rest being spilled to files of the
+    given directory:
+        - the frontier is a SpillQueue of encoded states (problem.encode_state)
+        - the visited states are a FingerprintSet of their 64-bit fingerprints
+          (two states with the same fingerprint are taken as equal, which is
+          unlikely to happen below billions of states)
+        - the parent of each visited state is appended to a log of fixed-size
+          (fingerprint, parent fingerprint, action index) entries, read back
+          to rebuild the path once a goal is found.
+    Every checkpoint_interval seconds, the frontier and the visited states are
+    written to disk and their file names and the counters of stats to a
+    checkpoint file: called with resume=True on the same directory and
+    problem, the search continues from the last checkpoint of an interrupted
+    run. The frontier segments are deleted once read and the visited runs once
+    merged (after the next checkpoint if the last one references them), so the
+    disk use follows the live frontier and visited set; the remaining files are
+    deleted when the search ends. Without directory, a temporary directory is
+    used (and no checkpoint is written).
+    The returned node is rebuilt by replaying the actions from the initial
+    state, so it is a regular Node."""
+    stats = (stats or SearchStats()).start()
+    root = Node(problem.initial)
+    if problem.goal_test(root.state):
+        return stats.stop(root, 0)
+
+    temporary = directory is None
+    if temporary:
+        directory = tempfile.mkdtemp(prefix='search_spill_')
+        checkpoint_interval = None
+    os.makedirs(directory, exist_ok=True)
+    checkpoint_file = os.path.join(directory, 'checkpoint')
+    log_file = os.path.join(directory, 'parents.log')
+    depth_size = struct.Struct('<I')
+    entry = struct.Struct('<QQI')
+    root_data = problem.encode_state(root.state)
+    root_fp = fingerprint(root_data)
+
+    saved = None
+    if resume and os.path.exists(checkpoint_file):
+        with open(checkpoint_file, 'rb') as fd:
+            saved = pickle.load(fd)
+        if saved['root'] != root_fp:
+            raise ValueError("{} is the checkpoint of another problem".format(checkpoint_file))
+    # Remove the files of a previous run (or those written after its checkpoint).
+    keep = set() if saved is None else {name for name, _ in saved['segments']} | set(saved['runs']) | {'checkpoint', 'parents.log'}
+    for name in os.listdir(directory):
+        if name not in keep and (name.endswith(('.seg', '.run')) or name in ('checkpoint', 'parents.log')):
+            os.remove(os.path.join(directory, name))
+
+    # Half of the memory for the visited fingerprints (about 64 bytes each in a set),
+    # the other half for the head and the tail of the frontier.
+    if saved is None:
+        frontier = SpillQueue(directory, memory_limit // 4)
+        visited = FingerprintSet(directory, max(1, memory_limit // 128))
+        log = open(log_file, 'wb')
+        visited.add(root_fp)
+        log.write(entry.pack(root_fp, root_fp, 0))
+        frontier.append(depth_size.pack(0) + root_data)
+    else:
+        frontier = SpillQueue(directory, memory_limit // 4, saved['segments'], saved['frontier_id'])
+        visited = FingerprintSet(directory, max(1, memory_limit // 128), saved['runs'], saved['visited_id'])
+        os.truncate(log_file, saved['log_size'])
+        log = open(log_file, 'ab')
+        stats.explored_nodes += saved['explored']
+        stats.generated_nodes += saved['generated']
+        stats.duplicates += saved['duplicates']
+        stats.max_frontier = max(stats.max_frontier, saved['max_frontier'])
+        if stats.per_depth is not None:
+            for depth, count in saved['per_depth'].items():
+                stats.per_depth[depth] = stats.per_depth.get(depth, 0) + count
+
+    def save_checkpoint():
+        frontier.flush()
+        visited.spill()
+        log.flush()
+        checkpoint = {
+            'root': root_fp,
+            'segments': list(frontier.segments),
+            'frontier_id': frontier.next_id,
+            'runs': [name for name, _, _ in visited.runs],
+            'visited_id': visited.next_id,
+            'log_size': log.tell(),
+            'explored': stats.explored_nodes,
+            'generated': stats.generated_nodes,
+            'duplicates': stats.duplicates,
+            'max_frontier': stats.max_frontier,
+            'per_depth': stats.per_depth or {},
+        }
+        with open(checkpoint_file + '.tmp', 'wb') as fd:
+            pickle.dump(checkpoint, fd)
+        os.replace(checkpoint_file + '.tmp', checkpoint_file)
+        # The files of the previous checkpoint are not needed any more.
+        frontier.discard_consumed()
+        visited.discard_obsolete()
+
+    finished = False
+    last_checkpoint = time.perf_counter()
+    try:
+        goal = None
+        while frontier and goal is None:
+            record = frontier.popleft()
+            data = record[depth_size.size:]
+            node = Node(problem.decode_state(data))
+            node.depth, = depth_size.unpack_from(record)
+            node_fp = fingerprint(data)
+            children = node.expand(problem)
+            stats.expand(node, children)
+            for index, child in enumerate(children):
+                child_data = problem.encode_state(child.state)
+                child_fp = fingerprint(child_data)
+                if child_fp in visited:
+                    stats.duplicates += 1
+                    continue
+                visited.add(child_fp)
+                log.write(entry.pack(child_fp, node_fp, index))
+                if problem.goal_test(child.state):
+                    goal = (node_fp, index)
+                    break
+                frontier.append(depth_size.pack(child.depth) + child_data)
+            stats.max_frontier = max(stats.max_frontier, len(frontier))
+            if checkpoint_interval is not None and time.perf_counter() - last_checkpoint >= checkpoint_interval:
+                save_checkpoint()
+                last_checkpoint = time.perf_counter()
+        finished = True
+
+        if goal is None:
+            return stats.stop(None, 0)
+        log.flush()
+        node_fp, index = goal
+        node = root
+        for index in _read_path(log_file, node_fp) + [index]:
+            node = node.child_node(problem, list(problem.actions(node.state))[index])
+        return stats.stop(node, len(frontier))
+    finally:
+        log.close()
+        visited.close()
+        if temporary:
+            shutil.rmtree(directory, ignore_errors=True)
+        elif finished:
+            for name in os.listdir(directory):
+                if name.endswith(('.seg', '.run')) or name in ('checkpoint', 'parents.log'):
+                    os.remove(os.path.join(directory, name))
 
 
 # ______________________________________________________________________________
 # Informed (Heuristic) Search
 
 
-greedy_best_first_graph_search = best_first_graph_search
+def greedy_best_first_graph_search(problem, h=None, display=False, stats=None, cache_size=2 ** 16, cache_policy='lru'):
+    """Greedy best-first search is accomplished by specifying f(n) = h(n).
+    h only depends on the state, so it is cached in a StateCache of
+    cache_size values (no cache if cache_size is 0)."""
+    h = h or problem.h
+    return best_first_graph_search(problem, StateCache(h, cache_size, cache_policy) if cache_size else h, display, stats)
 
-# Greedy best-first search is accomplished by specifying f(n) = h(n).
 
-def astar_search(problem, h=None, display=False):
+def astar_search(problem, h=None, display=False, stats=None, cache_size=2 ** 16, cache_policy='lru'):
     """A* search is best-first graph search with f(n) = g(n)+h(n).
     You need to specify the h function when you call astar_search, or
-    else in your Problem subclass."""
+    else in your Problem subclass. The values of h are cached by state in a
+    StateCache of cache_size values using cache_policy ('lru' or 'clock'),
+    no cache if cache_size is 0."""
+    h = h or problem.h
+    cache = StateCache(h, cache_size, cache_policy) if cache_size else None
+    h = memoize(h if cache is None else cache, 'h')
+    stats = best_first_graph_search(problem, lambda n: n.path_cost + h(n), display, stats)
+    return stats.count_cache(cache)
+
+
+def iterative_deepening_astar_search(problem, h=None, table_size=None, stats=None,
+                                     cache_size=2 ** 16, cache_policy='lru'):
+    """Iterative deepening A*: a sequence of depth-first searches, each one
+    pruning the nodes with f(n) = g(n) + h(n) above a threshold. The first
+    threshold is f(root), the next one the lowest f of the nodes pruned by the
+    previous iteration. With an admissible h the first goal found is optimal,
+    and only the current path and the children of its nodes are in memory.
+    The children of a node are searched by increasing f, and a child going
+    back to the state of its grandparent is skipped. If table_size is given,
+    a transposition table keeps the lowest g found for up to table_size
+    states in the iteration (the oldest entry is evicted when it is full);
+    a node reaching a state of the table without a lower g is skipped, its
+    subtree being searched from the other node with the same threshold.
+    The values of h, computed again for the same states at each iteration,
+    are cached as in astar_search.
+    stats.max_frontier is the depth of the deepest path, and a (threshold,
+    explored nodes in the iteration, cumulative explored nodes) tuple is
+    appended to stats.iterations after each iteration."""
+    stats = (stats or SearchStats()).start()
+    h = h or problem.h
+    cache = StateCache(h, cache_size, cache_policy) if cache_size else None
+    h = memoize(h if cache is None else cache, 'h')
+    root = Node(problem.initial)
+    f = lambda n: n.path_cost + h(n)
+    threshold = f(root)
+    while threshold < np.inf:
+        explored_before = stats.explored_nodes
+        next_threshold = np.inf
+        table = {}
+        path = [iter([root])]  # Children still to search at each depth of the current path
+        while path:
+            node = next(path[-1], None)
+            if node is None:
+                path.pop()
+                continue
+            if f(node) > threshold:
+                next_threshold = min(next_threshold, f(node))
+                continue
+            if table_size is not None:
+                if table.get(node.state, np.inf) <= node.path_cost:
+                    stats.duplicates += 1
+                    continue
+                if node.state not in table and len(table) >= table_size:
+                    del table[next(iter(table))]
+                table[node.state] = node.path_cost
+            if problem.goal_test(node.state):
+                stats.visit(node)
+                stats.iterations.append((threshold, stats.explored_nodes - explored_before, stats.explored_nodes))
+                return stats.stop(node, len(path)).count_cache(cache)
+            children = node.expand(problem)
+            stats.expand(node, children)
+            if node.parent is not None:
+                grandparent = node.parent.state
+                stats.duplicates += sum(child.state == grandparent for child in children)
+                children = [child for child in children if child.state != grandparent]
+            children.sort(key=f)
+            path.append(iter(children))
+            stats.max_frontier = max(stats.max_frontier, len(path))
+        stats.iterations.append((threshold, stats.explored_nodes - explored_before, stats.explored_nodes))
+        threshold = next_threshold
+    return stats.stop(None, 0).count_cache(cache)
+
+
+def anytime_beam_search(problem, h=None, width=8, time_limit=10, display=False, stats=None):
+    """Anytime beam search for problems too large for exact searches.
+    Each iteration is a breadth-first beam search keeping, at each depth, the
+    width nodes with the lowest f(n) = g(n) + h(n); the first iteration finds
+    a solution quickly, then the width is doubled at each iteration. Nodes that
+    cannot improve on the best solution so far (f(n) >= its cost, h being
+    admissible) are pruned, so an iteration goes on below the goals it finds
+    while cheaper ones may remain (step costs need not be unit costs). A state
+    is only expanded again when it is reached with a lower g(n) than in the
+    beams so far: memory is bounded by width * depth states, plus the children
+    of one layer. The best solution found so far is always in stats.node.
+    Stops when time_limit (seconds) is reached, or when an iteration did not
+    have to drop any node (the search was then exhaustive and the solution is
+    optimal).
+    A (width, explored nodes, cumulative explored nodes) tuple is appended to
+    stats.iterations after each iteration."""
+    stats = (stats or SearchStats()).start()
     h = memoize(h or problem.h, 'h')
-    return best_first_graph_search(problem, lambda n: n.path_cost + h(n), display)
+    deadline = time.perf_counter() + time_limit
+    root = Node(problem.initial)
+    if problem.goal_test(root.state):
+        return stats.stop(root, 0)
+    best_cost = np.inf
+
+    while time.perf_counter() < deadline:
+        explored_before = stats.explored_nodes
+        layer = [root]
+        seen = {root.state: 0}  # state -> lowest path cost in the beams of this iteration
+        truncated = False
+        while layer and time.perf_counter() < deadline:
+            candidates = {}  # state -> cheapest child of the layer
+            for node in layer:
+                expanded = node.expand(problem)
+                stats.expand(node, expanded)
+                for child in expanded:
+                    if (child.path_cost + h(child) >= best_cost
+                            or child.path_cost >= seen.get(child.state, np.inf)
+                            or child.state in candidates and child.path_cost >= candidates[child.state].path_cost):
+                        stats.duplicates += 1
+                        continue
+                    if problem.goal_test(child.state):
+                        best_cost = child.path_cost
+                        stats.node = child
+                        if display:
+                            print("Solution of cost", best_cost, "found with a beam of width", width)
+                        continue
+                    candidates[child.state] = child
+            # The children generated before the last goal may not improve on it.
+            children = [child for child in candidates.values() if child.path_cost + h(child) < best_cost]
+            if len(children) > width:
+                children = heapq.nsmallest(width, children, key=lambda n: n.path_cost + h(n))
+                truncated = True
+            for child in children:
+                seen[child.state] = child.path_cost
+            layer = children
+            stats.max_frontier = max(stats.max_frontier, len(layer))
+        if layer:  # Stopped by the time limit in the middle of the iteration.
+            truncated = True
+
+        stats.iterations.append((width, stats.explored_nodes - explored_before, stats.explored_nodes))
+        if not truncated:
+            break
+        width *= 2
+
+    return stats.stop(stats.node, 0)
 
 
 # ______________________________________________________________________________
 # Other search algorithms
 
 
-# TODO: remove
-def recursive_best_first_search(problem, h=None):
-    """[Figure 3.26]"""
-    h = memoize(h or problem.h, 'h')
-
-    def RBFS(problem, node, flimit):
-        if problem.goal_test(node.state):
-            return node, 0  # (The second value is immaterial)
-        successors = node.expand(problem)
-        if len(successors) == 0:
-            return None, np.inf
-        for s in successors:
-            s.f = max(s.path_cost + h(s), node.f)
-        while True:
-            # Order by lowest f value
-            successors.sort(key=lambda x: x.f)
-            best = successors[0]
-            if best.f > flimit:
-                return None, best.f
-            if len(successors) > 1:
-                alternative = successors[1].f
-            else:
-                alternative = np.inf
-            result, best.f = RBFS(problem, best, min(flimit, alternative))
-            if result is not None:
-                return result, best.f
-
-    node = Node(problem.initial)
-    node.f = h(node)
-    result, bestf = RBFS(problem, node, np.inf)
-    return result
-
-
 # TODO: remove
 def hill_climbing(problem):
     """
@@ -3,6 +3,7 @@
 import heapq
 import functools
 import random
+from collections import OrderedDict
 
 
 def is_in(elt, seq):
@@ -30,6 +31,67 @@ def memoize(fn, slot=None, maxsize=32):
     return memoized_fn
 
 
+class StateCache:
+    """Cache of fn(node) keyed by node.state, so that the nodes reaching the
+    same state share the value (memoize(fn, 'h') caches it on each node).
+    At most maxsize values are kept; when the cache is full, the policy
+    chooses the value to evict:
+        - 'lru': the least recently used one
+        - 'clock': the first one without its reference bit set, clearing the
+          bits on the way (second chance approximation of LRU, cheaper hits)
+    hits and misses count the calls answered from the cache or not."""
+
+    def __init__(self, fn, maxsize=2 ** 16, policy='lru'):
+        if policy not in ('lru', 'clock'):
+            raise ValueError("Policy must be either 'lru' or 'clock'.")
+        self.fn = fn
+        self.maxsize = maxsize
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+        self.values = OrderedDict()  # lru: state -> value, most recently used last
+        self.slots = {}  # clock: state -> index in the ring
+        self.ring = []  # clock: [state, value, reference bit]
+        self.hand = 0
+
+    def __call__(self, node):
+        key = node.state
+        if self.policy == 'lru':
+            if key in self.values:
+                self.hits += 1
+                self.values.move_to_end(key)
+                return self.values[key]
+            self.misses += 1
+            value = self.values[key] = self.fn(node)
+            if len(self.values) > self.maxsize:
+                self.values.popitem(last=False)
+            return value
+
+        slot = self.slots.get(key)
+        if slot is not None:
+            self.hits += 1
+            entry = self.ring[slot]
+            entry[2] = True
+            return entry[1]
+        self.misses += 1
+        value = self.fn(node)
+        if len(self.ring) < self.maxsize:
+            self.slots[key] = len(self.ring)
+            self.ring.append([key, value, False])
+            return value
+        while self.ring[self.hand][2]:
+            self.ring[self.hand][2] = False
+            self.hand = (self.hand + 1) % self.maxsize
+        del self.slots[self.ring[self.hand][0]]
+        self.ring[self.hand] = [key, value, False]
+        self.slots[key] = self.hand
+        self.hand = (self.hand + 1) % self.maxsize
+        return value
+
+    def __len__(self):
+        return len(self.values) if self.policy == 'lru' else len(self.ring)
+
+
 # ______________________________________________________________________________
 # argmin and argmax
 
@@ -126,6 +188,76 @@ class PriorityQueue:
         heapq.heapify(self.heap)
 
 
+class IndexedPriorityQueue:
+    """Same interface as PriorityQueue, but with O(1) membership tests and
+    O(log n) updates: a dict maps each item to its heap entry, and deleted
+    entries are only marked as removed (lazy invalidation) and skipped when
+    they reach the top of the heap. Items with equal f(x) are popped in
+    insertion order (the items themselves are never compared)."""
+
+    REMOVED = object()  # Placeholder of an invalidated entry
+
+    def __init__(self, order='min', f=lambda x: x):
+        self.heap = []
+        self.entries = {}  # item -> [f(item), counter, item]
+        self.counter = 0
+        if order == 'min':
+            self.f = f
+        elif order == 'max':  # now item with max f(x)
+            self.f = lambda x: -f(x)  # will be popped first
+        else:
+            raise ValueError("Order must be either 'min' or 'max'.")
+
+    def append(self, item):
+        """Insert item at its correct position, replacing any previous
+        occurrence of item."""
+        if item in self.entries:
+            del self[item]
+        entry = [self.f(item), self.counter, item]
+        self.counter += 1
+        self.entries[item] = entry
+        heapq.heappush(self.heap, entry)
+
+    def extend(self, items):
+        """Insert each item in items at its correct position."""
+        for item in items:
+            self.append(item)
+
+    def pop(self):
+        """Pop and return the item (with min or max f(x) value)
+        depending on the order."""
+        while self.heap:
+            _, _, item = heapq.heappop(self.heap)
+            if item is not self.REMOVED:
+                del self.entries[item]
+                return item
+        raise Exception('Trying to pop from empty PriorityQueue.')
+
+    def __len__(self):
+        """Return the number of (valid) items in the queue."""
+        return len(self.entries)
+
+    def __contains__(self, key):
+        """Return True if the key is in the queue."""
+        return key in self.entries
+
+    def __getitem__(self, key):
+        """Returns the value associated with key in the queue.
+        Raises KeyError if key is not present."""
+        try:
+            return self.entries[key][0]
+        except KeyError:
+            raise KeyError(str(key) + " is not in the priority queue")
+
+    def __delitem__(self, key):
+        """Delete key from the queue (its heap entry is invalidated)."""
+        try:
+            entry = self.entries.pop(key)
+        except KeyError:
+            raise KeyError(str(key) + " is not in the priority queue")
+        entry[-1] = self.REMOVED
+
+
 # ______________________________________________________________________________
 # Useful Shorthands
 
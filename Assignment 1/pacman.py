@@ -8,11 +8,17 @@ Student' name :
 - Mathis Delsart
 """
 
-import time
+import argparse
+import math
+import os
+import random
+import struct
 import sys
+from collections import deque
+
+import numpy as np
 
 from search import *
-from Extra.interface import show
 
 #################
 # Problem class #
@@ -32,52 +38,66 @@ The problem is defined by :
 class Pacman(Problem):
 
     """
-    Define the possible actions (= moves) for a given state of the problem.
+    Create the problem and precompute the possible moves of each free cell.
+    The walls never move, so the moves only depend on the position of the pacman.
 
-    @param state: the current state of the problem
-    @return: a list of the possible actions for the given state
+    @param initial: the initial state of the problem
     """
-    def actions(self, state):
-
-        nbRows, nbCols = state.shape
+    def __init__(self, initial, goal=None):
+        super().__init__(initial, goal)
+        nbRows, nbCols = initial.shape
+        grid = initial.grid
+        self.moves = {(i, j): tuple(slide_moves(grid, initial.shape, (i, j)))
+                      for i in range(nbRows) for j in range(nbCols) if grid[i][j] != "#"}
+
+        # Fruits are numbered in row-major order (same order as Maze.fruit_cells).
+        self.fruit_cells = tuple((i, j) for i, row in enumerate(grid) for j, cell in enumerate(row) if cell == "F")
+
+        # Precompilation of the move graph. A move can stop on any cell of its line, so the
+        # moves are symmetric and the strongly connected component of the pacman is the set
+        # of cells it can reach : the other cells are dropped from the move table, and the
+        # instance is infeasible if a fruit lies outside of it (get_search then rejects it
+        # without searching). Inside of it every cell leads to every fruit, so no move needs
+        # to be pruned during the search.
+        reachable = self.move_distances(initial.pos_pacman)
+        self.moves = {cell: dests for cell, dests in self.moves.items() if cell in reachable}
+        self.feasible = all(cell in reachable for cell in self.fruit_cells)
+        self.fruit_bits = {cell: 1 << k for k, cell in enumerate(self.fruit_cells)}
+        # Bitmask of the fruit cells reachable in one move from each free cell.
+        self.fruits_in_line = {cell: sum(self.fruit_bits.get(dest, 0) for dest in dests)
+                               for cell, dests in self.moves.items()}
+        self.distances = None  # Move distances to each fruit, computed on first use
+        self.mst_cache = {}  # Fruit bitmask -> weight of the minimum spanning tree
+
+        # Zobrist keys : one random 64-bit number per (cell, pacman) and (cell, fruit).
+        rng = random.Random(0)
+        self.zobrist_pacman = {cell: rng.getrandbits(64) for cell in self.moves}
+        self.zobrist_fruit = {cell: rng.getrandbits(64) for cell in self.fruit_cells}
+        self.initial = self.hashed_state(self.initial)
+
+        # Static part of the grid, to rebuild the states written to disk.
+        self.maze = getattr(initial, "maze", None) or Maze(initial.shape, grid)
+        self.fruit_bytes = (len(self.fruit_cells) + 7) // 8
 
-        # Add this attribute to the state class to avoid finding the position of the pacman at each state.
-        row_pac, col_pac = state.pos_pacman
-
-        result = []
-        
-        # Search for the possible moves in the 4 directions (up, down, left, right) and add them to the result list.
-        # If a wall is encountered, stop the search in the corresponding direction.
+    """
+    Return a copy of the given (grid) state with its fruit bitmask and Zobrist hash set.
+    """
+    def hashed_state(self, state):
+        fruits = sum(bit for (i, j), bit in self.fruit_bits.items() if state.grid[i][j] == "F")
+        zobrist = self.zobrist_pacman[state.pos_pacman]
+        for k, cell in enumerate(self.fruit_cells):
+            if fruits >> k & 1:
+                zobrist ^= self.zobrist_fruit[cell]
+        return State(state.shape, state.grid, state.answer, state.move, state.pos_pacman, fruits, zobrist)
 
-        # Right move
-        for k in range(1, nbCols - col_pac):
-            if (state.grid[row_pac][col_pac + k] == "#"):
-                break
-            else:
-                result.append((row_pac, col_pac + k))
+    """
+    Define the possible actions (= moves) for a given state of the problem.
 
-        # Left move
-        for k in range(1, col_pac + 1):
-            if (state.grid[row_pac][col_pac - k] == "#"):
-                break
-            else:
-                result.append((row_pac, col_pac - k))
-        
-        # Down move
-        for k in range(1, nbRows - row_pac):
-            if (state.grid[row_pac + k][col_pac] == "#"):
-                break
-            else:
-                result.append((row_pac + k, col_pac))
-        
-        # Up move
-        for k in range(1, row_pac + 1):
-            if (state.grid[row_pac - k][col_pac] == "#"):
-                break
-            else:
-                result.append((row_pac - k, col_pac))
-            
-        return result
+    @param state: the current state of the problem
+    @return: the possible actions for the given state
+    """
+    def actions(self, state):
+        return self.moves[state.pos_pacman]
 
     """
     Apply the given action to the given state and return the new state.
@@ -91,10 +111,16 @@ class Pacman(Problem):
         newX, newY = action
         row_pac, col_pac = state.pos_pacman
         new_answer = state.answer
+        new_fruits = state.fruits
+
+        # Update the Zobrist hash : XOR out the old pacman cell and XOR in the new one.
+        zobrist = state.zobrist ^ self.zobrist_pacman[state.pos_pacman] ^ self.zobrist_pacman[action]
 
         # Decrease the number of remaining fruits if a new furit is eaten.
         if state.grid[newX][newY] == "F":
             new_answer -= 1
+            new_fruits &= ~self.fruit_bits[action]
+            zobrist ^= self.zobrist_fruit[action]
         
         # Create the new grid by replacing the old position of the pacman by a dot and the new position by the pacman.
         new_grid = []
@@ -114,7 +140,7 @@ class Pacman(Problem):
         if new_answer == 0:
             move += " Goal State"
 
-        return State(state.shape, tuple(new_grid), new_answer, move, action)
+        return State(state.shape, tuple(new_grid), new_answer, move, action, new_fruits, zobrist)
 
     """
     Check if the given state is a goal state.
@@ -125,7 +151,173 @@ class Pacman(Problem):
     def goal_test(self, state):
         # True if the number of remaining fruits is 0 (goal state).
         return state.answer == 0
-        
+
+    """
+    Encode a state as bytes for the searches writing states to disk : the
+    position of the pacman (2 x 2 bytes) and the fruit bitmask.
+    """
+    def encode_state(self, state):
+        return struct.pack("<HH", *state.pos_pacman) + state.fruits.to_bytes(self.fruit_bytes, "little")
+
+    """
+    Rebuild a state encoded by encode_state.
+    """
+    def decode_state(self, data):
+        pos_pacman = struct.unpack_from("<HH", data)
+        fruits = int.from_bytes(data[4:], "little")
+        grid = self.maze.build_grid(pos_pacman, fruits)
+        move = "Move to ({}, {})".format(*pos_pacman)
+        return self.hashed_state(State(self.maze.shape, grid, fruits.bit_count(), move, pos_pacman))
+
+    """
+    Return the bitmask of the fruits remaining in the given state
+    (bit k set <=> fruit self.fruit_cells[k] is still on the grid).
+    """
+    def fruit_mask(self, state):
+        return state.fruits
+
+    """
+    Compute the minimal number of moves between the given cell and every
+    free cell (breadth-first search on the move table, moves are symmetric).
+    Cells dropped from the move table (see __init__) have no moves.
+
+    @param cell: the (row, col) source cell
+    @return: a dict mapping each reachable cell to its distance in moves
+    """
+    def move_distances(self, cell):
+        dist = {cell: 0}
+        queue = deque([cell])
+        while queue:
+            current = queue.popleft()
+            for dest in self.moves.get(current, ()):
+                if dest not in dist:
+                    dist[dest] = dist[current] + 1
+                    queue.append(dest)
+        return dist
+
+    """
+    Return the move distances from each fruit (one dict per fruit), computed once.
+    """
+    def fruit_distances(self):
+        if self.distances is None:
+            self.distances = [self.move_distances(cell) for cell in self.fruit_cells]
+        return self.distances
+
+    ##############
+    # Heuristics #
+    ##############
+    # All of them are admissible and consistent for the "eat all fruits" goal,
+    # so astar_search returns an optimal number of moves.
+
+    """
+    A move lands on a single cell, so it eats at most one fruit :
+    at least one move is needed per remaining fruit.
+    """
+    def h_fruits(self, node):
+        return self.fruit_mask(node.state).bit_count()
+
+    """
+    Row/column bound : one move per remaining fruit, plus one if no remaining
+    fruit is in line (same row or column, no wall in between) with the pacman,
+    as the first move cannot eat anything in that case.
+    """
+    def h_line(self, node):
+        mask = self.fruit_mask(node.state)
+        if mask == 0:
+            return 0
+        if mask & self.fruits_in_line[node.state.pos_pacman]:
+            return mask.bit_count()
+        return mask.bit_count() + 1
+
+    """
+    Distance (in moves) from the pacman to the nearest remaining fruit, plus the
+    weight of a minimum spanning tree of the remaining fruits, with the move
+    distances as edge weights. Any path visiting all the fruits is at least
+    as long. Infinite if a remaining fruit cannot be reached.
+    """
+    def h_mst(self, node):
+        mask = self.fruit_mask(node.state)
+        if mask == 0:
+            return 0
+        distances = self.fruit_distances()
+        pos = node.state.pos_pacman
+        nearest = min(distances[k].get(pos, math.inf) for k in range(len(self.fruit_cells)) if mask >> k & 1)
+        return nearest + self.mst(mask)
+
+    """
+    Weight of the minimum spanning tree of the fruits of the given bitmask
+    (Prim's algorithm, cached by bitmask).
+    """
+    def mst(self, mask):
+        if mask in self.mst_cache:
+            return self.mst_cache[mask]
+
+        distances = self.fruit_distances()
+        fruits = [k for k in range(len(self.fruit_cells)) if mask >> k & 1]
+        # Cost to connect each fruit outside the tree to the tree.
+        cost = {k: distances[fruits[0]].get(self.fruit_cells[k], math.inf) for k in fruits[1:]}
+        weight = 0
+        while cost:
+            k = min(cost, key=cost.get)
+            weight += cost.pop(k)
+            for other in cost:
+                cost[other] = min(cost[other], distances[k].get(self.fruit_cells[other], math.inf))
+
+        self.mst_cache[mask] = weight
+        return weight
+
+    # Heuristic used by astar_search when none is given.
+    def h(self, node):
+        return self.h_mst(node)
+
+
+"""
+Walk from pos in the 4 directions (right, left, down, up) until a wall is
+encountered and return the list of the cells reached on the way.
+Used once per free cell to build the move table of the Pacman problem.
+
+@param grid: a grid of the instance (only the walls are looked at)
+@param shape: the (nbRows, nbCols) shape of the grid
+@param pos: the (row, col) starting cell
+@return: the list of the cells reachable in one move from pos
+"""
+def slide_moves(grid, shape, pos):
+
+    nbRows, nbCols = shape
+    row_pac, col_pac = pos
+
+    result = []
+
+    # Right move
+    for k in range(1, nbCols - col_pac):
+        if (grid[row_pac][col_pac + k] == "#"):
+            break
+        else:
+            result.append((row_pac, col_pac + k))
+
+    # Left move
+    for k in range(1, col_pac + 1):
+        if (grid[row_pac][col_pac - k] == "#"):
+            break
+        else:
+            result.append((row_pac, col_pac - k))
+
+    # Down move
+    for k in range(1, nbRows - row_pac):
+        if (grid[row_pac + k][col_pac] == "#"):
+            break
+        else:
+            result.append((row_pac + k, col_pac))
+
+    # Up move
+    for k in range(1, row_pac + 1):
+        if (grid[row_pac - k][col_pac] == "#"):
+            break
+        else:
+            result.append((row_pac - k, col_pac))
+
+    return result
+
 
 ###############
 # State class #
@@ -138,7 +330,7 @@ class State:
     """
     Create a new state for the problem.
     """
-    def __init__(self, shape, grid, answer=None, move="Init", pos_pacman=None):
+    def __init__(self, shape, grid, answer=None, move="Init", pos_pacman=None, fruits=None, zobrist=None):
         self.shape = shape
         self.answer = answer
         self.grid = grid
@@ -146,14 +338,21 @@ class State:
         
         # Strip : Begin
         # Add this attribute to the class to avoid finding the position of the pacman at each state.
+        # The grid is only scanned when the position is not given.
         self.pos_pacman = pos_pacman;
-        for i, row in enumerate(grid):
-            for j, cell in enumerate(row):
-                if cell == 'P':
-                    self.pos_pacman = (i, j)
+        if pos_pacman is None:
+            for i, row in enumerate(grid):
+                for j, cell in enumerate(row):
+                    if cell == 'P':
+                        self.pos_pacman = (i, j)
+                        break
+                if self.pos_pacman is not None:
                     break
-            if self.pos_pacman is not None:
-                break
+
+        # Set by the Pacman problem : bitmask of the remaining fruits (see Pacman.fruit_cells)
+        # and Zobrist hash of the state, updated incrementally by Pacman.result.
+        self.fruits = fruits
+        self.zobrist = zobrist
         # Strip : End
 
     """
@@ -169,18 +368,270 @@ class State:
     """
     Define the hash and equality functions for the state.
     Used to compare states and avoid duplicates in the search algorithms.
+    The states created by a Pacman problem are hashed and compared in O(1)
+    with their Zobrist hash, pacman position and fruit bitmask : the walls
+    are the same for all of them, so these fields determine the grid.
     """
     def __hash__(self):
+        if self.zobrist is not None:
+            return self.zobrist
         return hash(self.grid)
 
     def __eq__(self, other):
-        return (isinstance(other, State) and self.grid == other.grid and self.answer == other.answer)
+        if not isinstance(other, State):
+            return False
+        if self.fruits is not None and other.fruits is not None:
+            return (self.zobrist == other.zobrist and self.pos_pacman == other.pos_pacman
+                    and self.fruits == other.fruits)
+        return self.grid == other.grid and self.answer == other.answer
     # Strip : End
 
     # Needs for "uniform_cost_search()"
     # def __lt__(self, other):
     #     pass
 
+
+#########################
+# Compact problem class #
+#########################
+"""
+Compact variant of the Pacman problem.
+
+The static part of the instance (shape and walls) is stored once in a Maze
+shared by every state, and a state only keeps the position of the pacman
+and an integer bitmask of the remaining fruits (bit i set <=> fruit i of
+maze.fruit_cells is still on the grid). Hashing, equality and successor
+creation are therefore O(1), whatever the size of the grid.
+"""
+class Maze:
+
+    """
+    Extract the static part of a grid.
+
+    @param shape: the (nbRows, nbCols) shape of the grid
+    @param grid: the initial grid (tuple of rows)
+    """
+    def __init__(self, shape, grid):
+        self.shape = shape
+        # Grid without the pacman nor the fruits : only walls and empty cells remain.
+        self.walls = tuple(tuple("#" if cell == "#" else "." for cell in row) for row in grid)
+        # Fruits are numbered in row-major order, fruit i <=> bit i of the bitmask.
+        self.fruit_cells = tuple((i, j) for i, row in enumerate(grid) for j, cell in enumerate(row) if cell == "F")
+        self.fruit_bits = {cell: 1 << k for k, cell in enumerate(self.fruit_cells)}
+
+    """
+    Return the bitmask with one bit set for each fruit of the maze.
+    """
+    def all_fruits(self):
+        return (1 << len(self.fruit_cells)) - 1
+
+    """
+    Rebuild the full grid (tuple of rows) for a given pacman position and fruit bitmask.
+    """
+    def build_grid(self, pos_pacman, fruits):
+        rows = [list(row) for row in self.walls]
+        for k, (i, j) in enumerate(self.fruit_cells):
+            if fruits >> k & 1:
+                rows[i][j] = "F"
+        if pos_pacman is not None:
+            rows[pos_pacman[0]][pos_pacman[1]] = "P"
+        return tuple(tuple(row) for row in rows)
+
+
+"""
+This class represents a state of the compact problem.
+"""
+class CompactState:
+
+    __slots__ = ("maze", "pos_pacman", "fruits", "action", "_hash")
+
+    """
+    Create a new compact state.
+
+    @param maze: the Maze shared by all the states of the problem
+    @param pos_pacman: the (row, col) position of the pacman
+    @param fruits: the bitmask of the remaining fruits
+    @param action: the move that led to this state (None for the initial state)
+    """
+    def __init__(self, maze, pos_pacman, fruits, action=None):
+        self.maze = maze
+        self.pos_pacman = pos_pacman
+        self.fruits = fruits
+        self.action = action
+        self._hash = hash((pos_pacman, fruits))
+
+    """
+    Number of remaining fruits (same meaning as State.answer).
+    """
+    @property
+    def answer(self):
+        return self.fruits.bit_count()
+
+    @property
+    def shape(self):
+        return self.maze.shape
+
+    """
+    The full grid is only rebuilt when it is asked for (printing, viewer).
+    """
+    @property
+    def grid(self):
+        return self.maze.build_grid(self.pos_pacman, self.fruits)
+
+    @property
+    def move(self):
+        if self.action is None:
+            return "Init"
+        move = "Move to ({}, {})".format(*self.action)
+        if self.fruits == 0:
+            move += " Goal State"
+        return move
+
+    """
+    Define the string representation of the state (same format as State).
+    """
+    def __str__(self):
+        s = self.move + "\n"
+        for line in self.grid:
+            s += "".join(line) + "\n"
+        return s
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        return (isinstance(other, CompactState) and self.pos_pacman == other.pos_pacman
+                and self.fruits == other.fruits)
+
+
+"""
+Same problem as Pacman, but working on CompactState instead of full grids.
+"""
+class CompactPacman(Pacman):
+
+    """
+    Create the compact problem from a (full grid) initial State.
+
+    @param initial: the initial State of the problem
+    """
+    def __init__(self, initial, goal=None):
+        maze = Maze(initial.shape, initial.grid)
+        super().__init__(CompactState(maze, initial.pos_pacman, maze.all_fruits()), goal)
+
+    """
+    Compact states are already hashed in O(1).
+    """
+    def hashed_state(self, state):
+        return state
+
+    """
+    Apply the given action to the given state and return the new state.
+    Only the position and the fruit bitmask change, the grid is never copied.
+
+    @param state: the current state of the problem
+    @param action: the action to apply to the state
+    @return: the new state after applying the action
+    """
+    def result(self, state, action):
+        # Clear the bit of the fruit eaten on the new cell (if any).
+        fruits = state.fruits & ~self.maze.fruit_bits.get(action, 0)
+        return CompactState(self.maze, action, fruits, action)
+
+    """
+    Check if the given state is a goal state.
+
+    @param state: the current state of the problem.
+    @return: True if no fruit remains on the grid, False otherwise.
+    """
+    def goal_test(self, state):
+        return state.fruits == 0
+
+    """
+    Rebuild a state encoded by encode_state.
+    """
+    def decode_state(self, data):
+        pos_pacman = struct.unpack_from("<HH", data)
+        return CompactState(self.maze, pos_pacman, int.from_bytes(data[4:], "little"), pos_pacman)
+
+####################
+# Held-Karp solver #
+####################
+"""
+Exact solver working on the fruits instead of the grid states.
+
+An optimal solution is a shortest tour starting on the pacman and visiting
+every fruit cell, the distance between two cells being the minimal number of
+moves between them (one breadth-first search per fruit on the move table).
+The best order of the fruits is found by dynamic programming over the subsets
+of fruits (Held-Karp) : best[mask, k] is the minimal number of moves to eat the
+fruits of mask, ending on fruit k. Passing over a fruit between two others can
+only make a tour shorter, so the optimal tour cost is also the optimal number
+of moves of the Pacman problem.
+
+@param problem: a Pacman (or CompactPacman) problem
+@param stats: the SearchStats to fill (a new one if None)
+@return: the SearchStats of the search, with the goal node (path rebuilt with
+         problem.result, as the other searches) and the number of subsets
+         evaluated as explored nodes
+"""
+def held_karp_search(problem, stats=None):
+
+    stats = (stats or SearchStats()).start()
+    INF = 10 ** 9
+    node = Node(problem.initial)
+    start = problem.initial.pos_pacman
+    fruits = [k for k in range(len(problem.fruit_cells)) if problem.fruit_mask(problem.initial) >> k & 1]
+    n = len(fruits)
+    if n == 0:
+        return stats.stop(node, 0)
+
+    distances = [problem.fruit_distances()[k] for k in fruits]
+    cells = [problem.fruit_cells[k] for k in fruits]
+    if any(start not in dist for dist in distances):
+        # A fruit cannot be reached from the pacman.
+        return stats.stop(None, 0)
+
+    dist = np.array([[distances[b][cells[a]] for b in range(n)] for a in range(n)], dtype=np.int32)
+    bits = 1 << np.arange(n)
+    indices = np.arange(n)
+
+    best = np.full((1 << n, n), INF, dtype=np.int32)
+    for k in range(n):
+        best[1 << k, k] = distances[k][start]
+
+    for mask in range(1, 1 << n):
+        row = best[mask]
+        if row.min() >= INF:
+            continue
+        stats.explored_nodes += 1
+        # Cheapest way to reach each fruit j from a fruit of mask, then add j to mask.
+        candidates = (row[:, None] + dist).min(axis=0)
+        outside = (bits & mask) == 0
+        targets = mask | bits[outside]
+        best[targets, indices[outside]] = np.minimum(best[targets, indices[outside]], candidates[outside])
+
+    # Rebuild the order of the fruits, from the last one to the first one.
+    mask = (1 << n) - 1
+    last = int(best[mask].argmin())
+    order = [last]
+    while mask != 1 << last:
+        previous_mask = mask ^ (1 << last)
+        previous = int((best[previous_mask] + dist[:, last]).argmin())
+        order.append(previous)
+        mask, last = previous_mask, previous
+    order.reverse()
+
+    # Follow the decreasing distances to each fruit to get the concrete moves.
+    cell = start
+    for k in order:
+        while cell != cells[k]:
+            cell = next(dest for dest in problem.moves[cell] if distances[k].get(dest, INF) == distances[k][cell] - 1)
+            node = node.child_node(problem, cell)
+            stats.generated_nodes += 1
+
+    return stats.stop(node, 0)
+
+
 """
 Read the instance file and return the shape of the grid, the initial grid and the initial number of fruits.
 """
@@ -195,48 +646,198 @@ def read_instance_file(filepath):
 
 
 """
-Launch the search algorithms to solve the Pacman problem.
+Return the search function (problem -> SearchStats) of the given algorithm
+name, as used on the command line. Infeasible problems are rejected at once,
+with no solution.
 """
-if __name__ == "__main__":
-    
-    if len(sys.argv) != 2:
-        print(f"Usage: ./Pacman.py <path_to_instance_file>")
-        exit(1)
+def get_search(algorithm, heuristic="mst", time_limit=10, verbose=False, workers=4,
+               spill_dir=None, memory_limit=256, resume=False, table_size=2 ** 20, cache_size=2 ** 16,
+               cache_policy="lru"):
+    searches = {
+        "bfs_graph": breadth_first_graph_search,
+        "dfs_graph": depth_first_graph_search,
+        "bfs_tree": breadth_first_tree_search,
+        "dfs_tree": depth_first_tree_search,
+        "ids": iterative_deepening_search,
+        "ucs": uniform_cost_search,
+        "astar": lambda problem, stats=None: astar_search(
+            problem, getattr(problem, "h_" + heuristic), stats=stats, cache_size=cache_size, cache_policy=cache_policy),
+        "idastar": lambda problem, stats=None: iterative_deepening_astar_search(
+            problem, getattr(problem, "h_" + heuristic), table_size or None, stats=stats,
+            cache_size=cache_size, cache_policy=cache_policy),
+        "held_karp": held_karp_search,
+        "anytime": lambda problem, stats=None: anytime_beam_search(
+            problem, getattr(problem, "h_" + heuristic), time_limit=time_limit, display=verbose, stats=stats),
+        "parallel_bfs": lambda problem, stats=None: parallel_breadth_first_search(problem, workers, stats=stats),
+        "bfs_disk": lambda problem, stats=None: memory_bounded_breadth_first_search(
+            problem, spill_dir, memory_limit * 2 ** 20, resume=resume, stats=stats),
+    }
+    search = searches[algorithm]
+
+    def feasible_search(problem, stats=None):
+        # An infeasible instance (see Pacman.__init__) has no solution : it is rejected without searching.
+        if not problem.feasible:
+            return (stats or SearchStats()).start().stop(None, 0)
+        return search(problem, stats=stats)
+
+    return feasible_search
+
+ALGORITHMS = ["bfs_graph", "dfs_graph", "bfs_tree", "dfs_tree", "ids", "ucs", "astar", "idastar", "held_karp", "anytime",
+              "parallel_bfs", "bfs_disk"]
+
+
+"""
+Return the sorted list of the instance files given on the command line
+(each path is either an instance file or a directory of instance files).
+"""
+def list_instances(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                if os.path.isfile(os.path.join(path, name))))
+        else:
+            files.append(path)
+    return files
 
-    # Get the path to the instance file from the command line arguments.
-    filepath = sys.argv[1]
 
-    # Read the instance file and create the initial state of the problem.
+"""
+Create the Pacman (or CompactPacman) problem of an instance file.
+"""
+def load_problem(filepath, compact=False):
     shape, initial_grid, initial_fruit_count = read_instance_file(filepath)
     init_state = State(shape, tuple(initial_grid), initial_fruit_count, "Init")
+    if compact:
+        return CompactPacman(init_state)
+    return Pacman(init_state)
 
-    problem = Pacman(init_state)
 
-    start_timer = time.perf_counter()
+"""
+Solutions file : one line per instance, "<instance path>\t<r>,<c> <r>,<c> ..."
+with the cells the pacman moves to ("-" if no solution was found).
+"""
+def write_solutions(filename, solutions):
+    with open(filename, "w") as fd:
+        for filepath, actions in solutions:
+            moves = "-" if actions is None else " ".join("{},{}".format(*action) for action in actions)
+            fd.write("{}\t{}\n".format(filepath, moves))
 
-    node, nb_explored, remaining_nodes = breadth_first_graph_search(problem)
 
-    # Other search algorithms available in the search.py file.
+def read_solutions(filename):
+    solutions = []
+    with open(filename) as fd:
+        for line in fd.read().splitlines():
+            filepath, moves = line.split("\t")
+            actions = None if moves == "-" else [tuple(map(int, move.split(","))) for move in moves.split()]
+            solutions.append((filepath, actions))
+    return solutions
 
-    # node, nb_explored, remaining_nodes = depth_first_graph_search(problem)
-    # node, nb_explored, remaining_nodes = breadth_first_tree_search(problem)
-    # node, nb_explored, remaining_nodes = iterative_deepening_search(problem)
-    # node, nb_explored, remaining_nodes = depth_first_tree_search(problem)
-    # node, nb_explored, remaining_nodes = depth_first_tree_search(problem)
 
-    end_timer = time.perf_counter()
+"""
+Rebuild the goal node of a solution by applying its moves from the initial state.
+"""
+def replay_solution(problem, actions):
+    node = Node(problem.initial)
+    for action in actions:
+        node = node.child_node(problem, action)
+    return node
 
-    # Get the path from the initial state to the goal state.
-    path = node.path()
 
-    # Print the optimal path found by the search algorithm.
-    for node in path:
-        print(node.state)
-        show(node)
+"""
+Show the path of a node with the pygame viewer.
+pygame (and its images) are only loaded when a path is actually displayed.
+"""
+def display(node):
+    from Extra.interface import show
+    show(node)
 
-    # Print the statistics of the search algorithm.
-        
-    print("* Execution time:\t", str(end_timer - start_timer))
-    print("* Path cost to goal:\t", node.depth, "moves")
-    print("* # Nodes explored:\t", nb_explored)
-    print("* Queue size at goal:\t",  remaining_nodes)
\ No newline at end of file
+
+"""
+Launch the search algorithms to solve the Pacman problem.
+"""
+if __name__ == "__main__":
+    
+    parser = argparse.ArgumentParser(description="Pacman solver")
+    parser.add_argument("instances", type=str, nargs="*", help="Instance files or directories of instance files")
+    parser.add_argument("-c", "--compact", action="store_true", help="Use the compact (position, fruit bitmask) states")
+    parser.add_argument("-a", "--algorithm", type=str, default="bfs_graph",
+                        choices=ALGORITHMS, help="Search algorithm")
+    parser.add_argument("-H", "--heuristic", type=str, default="mst", choices=["fruits", "line", "mst"],
+                        help="Heuristic used by the astar, idastar and anytime algorithms")
+    parser.add_argument("-t", "--time-limit", type=float, default=10,
+                        help="Time limit (in seconds) of the anytime algorithm")
+    parser.add_argument("-j", "--workers", type=int, default=4, help="Worker processes of the parallel_bfs algorithm")
+    parser.add_argument("--table-size", type=int, default=2 ** 20,
+                        help="Entries of the transposition table of the idastar algorithm (0: no table)")
+    parser.add_argument("--cache-size", type=int, default=2 ** 16,
+                        help="Heuristic values cached by state by the astar and idastar algorithms (0: no cache)")
+    parser.add_argument("--cache-policy", type=str, default="lru", choices=["lru", "clock"],
+                        help="Eviction policy of the heuristic cache")
+    parser.add_argument("--spill-dir", type=str, default=None,
+                        help="Directory of the files (and checkpoint) of the bfs_disk algorithm (default: temporary)")
+    parser.add_argument("--memory-limit", type=int, default=256,
+                        help="Memory (in MiB) of the bfs_disk algorithm before spilling to disk")
+    parser.add_argument("--resume", action="store_true", help="Resume the bfs_disk algorithm from its checkpoint")
+    parser.add_argument("--per-depth", action="store_true", help="Count the explored nodes per depth")
+    parser.add_argument("--memory", action="store_true", help="Measure the peak memory of the search (slower)")
+    parser.add_argument("--headless", action="store_true",
+                        help="Batch mode : no path printed nor displayed, one summary line per instance")
+    parser.add_argument("-o", "--output", type=str, default=None, help="Write the solutions to this file")
+    parser.add_argument("-r", "--replay", type=str, default=None, help="Display the solutions of a solutions file")
+    args = parser.parse_args()
+
+    if args.replay is not None:
+        for filepath, actions in read_solutions(args.replay):
+            if actions is not None:
+                display(replay_solution(load_problem(filepath), actions))
+        sys.exit(0)
+
+    if not args.instances:
+        parser.error("at least one instance is required")
+
+    solutions = []
+    for filepath in list_instances(args.instances):
+
+        # Read the instance file and create the initial state of the problem.
+        problem = load_problem(filepath, args.compact)
+
+        stats = SearchStats(per_depth=args.per_depth, trace_memory=args.memory)
+        get_search(args.algorithm, heuristic=args.heuristic, time_limit=args.time_limit, verbose=not args.headless,
+                   workers=args.workers, spill_dir=args.spill_dir, memory_limit=args.memory_limit,
+                   resume=args.resume, table_size=args.table_size, cache_size=args.cache_size,
+                   cache_policy=args.cache_policy)(problem, stats=stats)
+        solutions.append((filepath, None if stats.node is None else stats.node.solution()))
+
+        if args.headless:
+            cost = "-" if stats.node is None else stats.node.depth
+            print("{}\t{} moves\t{} explored\t{:.6f} s".format(filepath, cost, stats.explored_nodes, stats.elapsed))
+            continue
+
+        if stats.node is None:
+            print(filepath, ": no solution found" if problem.feasible else ": infeasible, a fruit cannot be reached")
+            continue
+
+        # Print the optimal path found by the search algorithm.
+        for node in stats.node.path():
+            print(node.state)
+
+        # Print the statistics of the search algorithm.
+
+        print("* Execution time:\t", str(stats.elapsed))
+        print("* Path cost to goal:\t", node.depth, "moves")
+        print("* # Nodes explored:\t", stats.explored_nodes)
+        print("* Queue size at goal:\t",  stats.frontier_size)
+        print("* # Nodes generated:\t", stats.generated_nodes)
+        print("* # Duplicates pruned:\t", stats.duplicates)
+        print("* Max queue size:\t", stats.max_frontier)
+        if stats.peak_memory is not None:
+            print("* Peak memory:\t\t", stats.peak_memory // 1024, "KiB")
+        if stats.cache_hits or stats.cache_misses:
+            print("* Heuristic cache:\t", stats.cache_hits, "hits,", stats.cache_misses, "misses")
+        if stats.per_depth is not None:
+            print("* # Nodes per depth:\t", stats.per_depth)
+
+        display(stats.node)
+
+    if args.output is not None:
+        write_solutions(args.output, solutions)